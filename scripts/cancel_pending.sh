@@ -0,0 +1,21 @@
+#!/bin/bash
+###############################################################################
+# GAAP - Cancel Deferred Notifications
+# Runs on UserPromptSubmit / PostToolUse: the user is active again, so any
+# notification held by notify.sh / permission_notify.sh for this session is
+# dropped. Pure bash (no Python) since it runs on every tool call.
+###############################################################################
+
+read -r input || true
+
+CWD=$(echo "$input" | grep -o '"cwd":"[^"]*"' | sed 's/"cwd":"//;s/"$//' || true)
+SESSION_ID=$(echo "$input" | grep -o '"session_id":"[^"]*"' | sed 's/"session_id":"//;s/"$//' || true)
+
+MARKER="$CWD/.claude/.gaap_pending/$SESSION_ID"
+if [ -n "$CWD" ] && [ -n "$SESSION_ID" ] && [ -f "$MARKER" ]; then
+    rm -f "$MARKER"
+    HOOK_EVENT=$(echo "$input" | grep -o '"hook_event_name":"[^"]*"' | sed 's/"hook_event_name":"//;s/"$//' || true)
+    echo "[$(date '+%Y-%m-%d %H:%M:%S')] DEFER: $HOOK_EVENT cancels pending notification (session $SESSION_ID)" >> "$CWD/.claude/.gaap_trace.log" 2>/dev/null || true
+fi
+
+exit 0
@@ -10,28 +10,6 @@ import sys
 import os
 import time
 
-# Check required packages
-MISSING_PACKAGES = []
-
-try:
-    import anthropic
-except ImportError:
-    MISSING_PACKAGES.append("anthropic")
-
-try:
-    import httpx
-    # Check if socks support is available
-    try:
-        import socksio
-    except ImportError:
-        MISSING_PACKAGES.append("httpx[socks]")
-except ImportError:
-    MISSING_PACKAGES.append("httpx[socks]")
-
-if MISSING_PACKAGES:
-    print(f"Error: missing packages: {', '.join(MISSING_PACKAGES)}. Run: pip install anthropic httpx[socks]", file=sys.stderr)
-    sys.exit(1)
-
 # Project-level config (via GAAP_PROJECT_DIR env var)
 PROJECT_DIR = os.environ.get("GAAP_PROJECT_DIR", ".")
 CONFIG_PATH = os.path.join(PROJECT_DIR, ".claude/gaap.json")
@@ -75,20 +53,72 @@ def resolve_api_key(key_str):
     return key_str
 
 
-def call_api(base_url, api_key, model, message, lang="zh"):
+def report_call(config, model, request, response, elapsed):
+    """Feed the governor and recorder (None response = failed call).
+
+    Both are imported only when configured, to keep hook startup lean.
+    """
+    config = config or {}
+    usage = response.usage if response is not None else None
+    if "governor" in config:
+        import governor
+        governor.record_call(config, elapsed, usage)
+    if config.get("record") not in (None, False):
+        import recorder
+        text = response.content[0].text if response is not None else None
+        recorder.record_provider(config, "compress", model, request, text, usage, elapsed)
+
+
+def import_sdk():
+    """
+    Import the Anthropic SDK on first need (it dominates startup time).
+    Exits 1 if packages are missing, so notify.sh falls back to the plain message.
+    """
+    missing = []
+    try:
+        import anthropic
+    except ImportError:
+        anthropic = None
+        missing.append("anthropic")
+
+    try:
+        import httpx  # noqa: F401
+        # Check if socks support is available
+        try:
+            import socksio  # noqa: F401
+        except ImportError:
+            missing.append("httpx[socks]")
+    except ImportError:
+        missing.append("httpx[socks]")
+
+    if missing:
+        print(f"Error: missing packages: {', '.join(missing)}. Run: pip install anthropic httpx[socks]", file=sys.stderr)
+        sys.exit(1)
+    return anthropic
+
+
+def call_api(base_url, api_key, model, message, lang="zh", config=None):
     """Call Anthropic-compatible API using SDK (handles /v1/messages automatically)"""
+    import anthropic
+
     client = anthropic.Anthropic(
         api_key=api_key,
         base_url=base_url,
         timeout=15.0,
     )
 
-    response = client.messages.create(
-        model=model,
-        max_tokens=200,
-        system=PROMPTS.get(lang, PROMPTS["zh"]),
-        messages=[{"role": "user", "content": message}]
-    )
+    start = time.monotonic()
+    try:
+        response = client.messages.create(
+            model=model,
+            max_tokens=200,
+            system=PROMPTS.get(lang, PROMPTS["zh"]),
+            messages=[{"role": "user", "content": message}]
+        )
+    except Exception:
+        report_call(config, model, message, None, time.monotonic() - start)
+        raise
+    report_call(config, model, message, response, time.monotonic() - start)
 
     return response.content[0].text
 
@@ -116,8 +146,9 @@ def compress(message):
     if not api_key:
         return None
 
+    anthropic = import_sdk()
     try:
-        return call_api(base_url, api_key, model, message, lang)
+        return call_api(base_url, api_key, model, message, lang, config)
     except anthropic.APIError as e:
         log_error("Anthropic API error", e)
         return None
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+GAAP - Multi-channel Notification Delivery
+
+Fans a notification out to every channel configured in gaap.json concurrently,
+so total latency is that of the slowest channel instead of the sum.
+Falls back to the single FEISHU_WEBHOOK_URL when no channels are configured.
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+try:
+    import httpx
+except ImportError:
+    httpx = None  # Fallback to urllib (curl behind SOCKS proxies) in a thread pool
+
+# Project-level config (via GAAP_PROJECT_DIR env var)
+PROJECT_DIR = os.environ.get("GAAP_PROJECT_DIR", ".")
+CONFIG_PATH = os.path.join(PROJECT_DIR, ".claude/gaap.json")
+WEBHOOK_FILE_PATH = os.path.join(PROJECT_DIR, ".claude/feishu-webhook-url")
+ERROR_LOG_PATH = os.path.join(PROJECT_DIR, ".claude/.gaap_error.log")
+
+DEFAULT_TEMPLATE = "[{host}|{session}] {text}"
+DEFAULT_TIMEOUT = 5.0  # seconds per attempt
+DEFAULT_RETRIES = 3
+DELIVERY_DEADLINE = 8.0  # seconds for all channels (hook timeout is 10s)
+
+
+def log_error(message, error=None):
+    """Log errors to a file for debugging"""
+    try:
+        os.makedirs(os.path.dirname(ERROR_LOG_PATH), exist_ok=True)
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        error_detail = f": {type(error).__name__}: {error}" if error else ""
+        with open(ERROR_LOG_PATH, 'a') as f:
+            f.write(f"[{timestamp}] deliver.py: {message}{error_detail}\n")
+    except Exception:
+        pass  # Don't fail if we can't write to log
+
+
+def load_config():
+    if not os.path.exists(CONFIG_PATH):
+        return None
+    try:
+        with open(CONFIG_PATH, 'r') as f:
+            return json.load(f)
+    except (IOError, json.JSONDecodeError) as e:
+        log_error(f"Failed to load config from {CONFIG_PATH}", e)
+        return None
+
+
+def resolve_value(value):
+    """Resolve config value - supports $ENV_VAR format"""
+    if not value:
+        return None
+    if isinstance(value, str) and value.startswith("$"):
+        return os.environ.get(value[1:])
+    return value
+
+
+def default_channels():
+    """Legacy single-webhook setup: FEISHU_WEBHOOK_URL > .claude/feishu-webhook-url"""
+    url = os.environ.get("FEISHU_WEBHOOK_URL")
+    if not url and os.path.exists(WEBHOOK_FILE_PATH):
+        try:
+            with open(WEBHOOK_FILE_PATH, 'r') as f:
+                url = f.read().strip()
+        except IOError as e:
+            log_error(f"Failed to read {WEBHOOK_FILE_PATH}", e)
+    return [{"type": "feishu", "url": url}] if url else []
+
+
+def load_channels(config):
+    channels = (config or {}).get("channels")
+    if not channels:
+        return default_channels()
+    return [c for c in channels if isinstance(c, dict) and c.get("enabled", True)]
+
+
+def channel_name(channel, index):
+    return channel.get("name") or f"{channel.get('type', 'feishu')}#{index}"
+
+
+def render(channel, host, session, event, text):
+    """Render the message text using the channel's template"""
+    template = channel.get("template", DEFAULT_TEMPLATE)
+    try:
+        return template.format(host=host, session=session, event=event, text=text)
+    except (KeyError, IndexError, ValueError) as e:
+        log_error(f"Bad template {template!r}, using default", e)
+        return DEFAULT_TEMPLATE.format(host=host, session=session, event=event, text=text)
+
+
+def feishu_sign(secret, timestamp):
+    """Signature for Feishu/Lark bots with signature verification enabled"""
+    string_to_sign = f"{timestamp}\n{secret}"
+    digest = hmac.new(string_to_sign.encode(), digestmod=hashlib.sha256).digest()
+    return base64.b64encode(digest).decode()
+
+
+def build_payload(channel, host, session, event, text):
+    """Build the JSON body for an HTTP channel"""
+    message = render(channel, host, session, event, text)
+    kind = channel.get("type", "feishu")
+
+    if kind in ("feishu", "lark"):
+        payload = {"msg_type": "text", "content": {"text": message}}
+        secret = resolve_value(channel.get("secret"))
+        if secret:
+            timestamp = str(int(time.time()))
+            payload["timestamp"] = timestamp
+            payload["sign"] = feishu_sign(secret, timestamp)
+        return payload
+
+    if kind == "relay":
+        # Compact event for relay.py, which batches and formats digests itself
+        return {
+            "host": host,
+            "session": session,
+            "event": event,
+            "text": text,
+            "group": channel.get("group", "default"),
+        }
+
+    # Generic JSON webhook: structured fields plus the rendered message
+    return {
+        "host": host,
+        "session": session,
+        "event": event,
+        "text": text,
+        "message": message,
+        "timestamp": int(time.time()),
+    }
+
+
+def socks_proxy(url):
+    """SOCKS proxy from the environment for this URL (urllib can't use those), or None"""
+    parsed = urllib.parse.urlsplit(url)
+    proxies = urllib.request.getproxies()
+    proxy = proxies.get(parsed.scheme) or proxies.get("all")
+    if not proxy or not proxy.lower().startswith("socks"):
+        return None
+    if parsed.hostname and urllib.request.proxy_bypass(parsed.hostname):
+        return None
+    return proxy
+
+
+def _post_curl(url, body, headers, timeout, proxy):
+    """POST via curl, which speaks SOCKS natively (as the original bash hooks did)"""
+    cmd = ["curl", "-s", "-o", "/dev/null", "-w", "%{http_code}", "-X", "POST",
+           "--proxy", proxy, "--max-time", str(timeout), "--data-binary", "@-"]
+    for key, value in headers.items():
+        cmd += ["-H", f"{key}: {value}"]
+    result = subprocess.run(cmd + [url], input=body, capture_output=True, timeout=timeout + 5)
+    if result.returncode != 0:
+        raise OSError(f"curl exited with {result.returncode}")
+    return int(result.stdout or 0)
+
+
+def _post_urllib(url, body, headers, timeout):
+    """Blocking POST for when httpx isn't usable (run in a thread pool)"""
+    proxy = socks_proxy(url)
+    if proxy:
+        return _post_curl(url, body, headers, timeout, proxy)
+    request = urllib.request.Request(url, data=body, headers=headers, method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+async def post_json(client, url, payload, headers, timeout):
+    """POST JSON and return the HTTP status code"""
+    body = json.dumps(payload, ensure_ascii=False).encode()
+    headers = {"Content-Type": "application/json", **headers}
+    if client is not None:
+        response = await client.post(url, content=body, headers=headers, timeout=timeout)
+        return response.status_code
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, _post_urllib, url, body, headers, timeout)
+
+
+async def send_http(client, channel, host, session, event, text):
+    url = resolve_value(channel.get("url"))
+    if not url:
+        raise ValueError("missing url")
+
+    payload = build_payload(channel, host, session, event, text)
+    headers = {k: resolve_value(v) or "" for k, v in channel.get("headers", {}).items()}
+    token = resolve_value(channel.get("token"))
+    if token:
+        headers["X-GAAP-Token"] = token
+    timeout = float(channel.get("timeout", DEFAULT_TIMEOUT))
+    retries = max(1, int(channel.get("retries", DEFAULT_RETRIES)))
+
+    status = 0
+    for attempt in range(retries):
+        try:
+            status = await post_json(client, url, payload, headers, timeout)
+        except Exception as e:
+            if attempt == retries - 1:
+                raise
+            log_error(f"attempt {attempt + 1} to {channel.get('type', 'feishu')} failed", e)
+        if 200 <= status < 300:
+            return status
+        if attempt < retries - 1:
+            await asyncio.sleep(1)
+    raise RuntimeError(f"HTTP {status}")
+
+
+async def send_file(channel, host, session, event, text):
+    path = channel.get("path", ".claude/gaap_notifications.log")
+    if not os.path.isabs(path):
+        path = os.path.join(PROJECT_DIR, path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    line = render(channel, host, session, event, text).replace("\n", " ")
+    with open(path, 'a') as f:
+        f.write(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {line}\n")
+    return "ok"
+
+
+async def send_channel(client, channel, host, session, event, text):
+    if channel.get("type") == "file":
+        return await send_file(channel, host, session, event, text)
+    return await send_http(client, channel, host, session, event, text)
+
+
+async def fan_out(channels, host, session, event, text):
+    """Send to all channels concurrently. Failures are isolated per channel."""
+    client = None
+    if httpx is not None and any(c.get("type") != "file" for c in channels):
+        try:
+            client = httpx.AsyncClient(limits=httpx.Limits(max_connections=len(channels) * 2))
+        except Exception as e:
+            # e.g. SOCKS proxy in the environment without socksio installed
+            log_error("httpx client unavailable, using urllib", e)
+
+    try:
+        tasks = [
+            asyncio.wait_for(
+                send_channel(client, channel, host, session, event, text),
+                float(channel.get("deadline", DELIVERY_DEADLINE)),
+            )
+            for channel in channels
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        if client is not None:
+            await client.aclose()
+
+    report = []
+    for index, (channel, result) in enumerate(zip(channels, results)):
+        name = channel_name(channel, index)
+        if isinstance(result, BaseException):
+            kind = "timeout" if isinstance(result, asyncio.TimeoutError) else f"{type(result).__name__}: {result}"
+            log_error(f"channel {name} failed: {kind}")
+            report.append((name, False, kind))
+        else:
+            report.append((name, True, str(result)))
+    return report
+
+
+def deliver(text, host="?", session="?", event=""):
+    """Deliver a notification to all configured channels.
+
+    Returns a list of (channel_name, ok, detail) tuples.
+    """
+    channels = load_channels(load_config())
+    if not channels:
+        return []
+    return asyncio.run(fan_out(channels, host, session, event, text))
+
+
+def main():
+    """
+    Usage: deliver.py <host> <session> [event]  (message text on stdin)
+    Prints one status line per channel.
+    """
+    host = sys.argv[1] if len(sys.argv) > 1 else "?"
+    session = sys.argv[2] if len(sys.argv) > 2 else "?"
+    event = sys.argv[3] if len(sys.argv) > 3 else ""
+
+    text = sys.stdin.read().strip()
+    if not text:
+        return
+
+    for name, ok, detail in deliver(text, host, session, event):
+        print(f"{name}: {'ok' if ok else 'failed'} ({detail})")
+
+
+if __name__ == "__main__":
+    main()
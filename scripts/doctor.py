@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+GAAP Doctor - Endpoint latency probing
+
+Probes each feishu / lark / webhook channel (or the legacy Feishu webhook) and
+each candidate Anthropic-compatible endpoint several times, reports connect / TLS / first-token latency percentiles and
+optionally writes the fastest healthy endpoint into gaap.json.
+
+Usage: doctor.py [--runs 5] [--write] [--candidate BASE_URL MODEL]...
+
+Candidates are the current "compress" endpoint plus "compress.candidates"
+in gaap.json, e.g. [{"base_url": "...", "model": "...", "api_key": "$KEY"}].
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import ssl
+import sys
+import time
+from urllib.parse import urlsplit
+
+try:
+    import httpx
+except ImportError:
+    httpx = None  # Fallback to raw sockets (no proxy support)
+
+from deliver import channel_name, load_channels, resolve_value
+
+# Project-level config
+PROJECT_DIR = os.environ.get("GAAP_PROJECT_DIR", ".")
+CONFIG_PATH = os.path.join(PROJECT_DIR, ".claude/gaap.json")
+ENV_PATH = os.path.join(PROJECT_DIR, ".env")
+
+DEFAULT_RUNS = 5
+DEFAULT_TIMEOUT = 10.0
+HEALTHY_RATIO = 0.8  # share of successful runs for an endpoint to be eligible
+ANTHROPIC_VERSION = "2023-06-01"
+FIRST_TOKEN_MARKER = "content_block_delta"
+WEBHOOK_CHANNEL_TYPES = ("feishu", "lark", "webhook")  # HTTP channels worth probing
+
+# ANSI colors (same as setup.py)
+BOLD = "\033[1m"
+GREEN = "\033[32m"
+YELLOW = "\033[33m"
+CYAN = "\033[36m"
+RED = "\033[31m"
+RESET = "\033[0m"
+
+
+def load_config():
+    if os.path.exists(CONFIG_PATH):
+        try:
+            with open(CONFIG_PATH, 'r') as f:
+                return json.load(f)
+        except (IOError, json.JSONDecodeError):
+            pass
+    return {}
+
+
+def save_config(config):
+    os.makedirs(os.path.dirname(CONFIG_PATH), exist_ok=True)
+    with open(CONFIG_PATH, 'w') as f:
+        json.dump(config, f, indent=2, ensure_ascii=False)
+
+
+def load_env():
+    """Load .env into os.environ (existing variables win), like the hook scripts do"""
+    if not os.path.exists(ENV_PATH):
+        return
+    with open(ENV_PATH, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#') and '=' in line:
+                key, value = line.split('=', 1)
+                os.environ.setdefault(key.strip(), value.strip().strip('"\''))
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _probe_httpx(method, url, headers, body, marker, timeout):
+    """Probe through httpx (honours HTTP/SOCKS proxy env vars), timed via trace events"""
+    marks = {}
+
+    def trace(event_name, info):
+        marks.setdefault(event_name, time.perf_counter())
+
+    start = time.perf_counter()
+    with httpx.Client(timeout=timeout) as client:
+        with client.stream(method, url, headers=headers, content=body,
+                           extensions={"trace": trace}) as response:
+            headers_at = time.perf_counter()
+            first_at = None
+            if marker and response.status_code == 200:
+                for line in response.iter_lines():
+                    if marker in line:
+                        first_at = time.perf_counter()
+                        break
+            status = response.status_code
+
+    connect_at = marks.get("connection.connect_tcp.complete", start)
+    tls_started = marks.get("connection.start_tls.started")
+    tls_done = marks.get("connection.start_tls.complete")
+    return {
+        "status": status,
+        "connect": (connect_at - start) * 1000,
+        "tls": (tls_done - tls_started) * 1000 if tls_started and tls_done else 0.0,
+        "ttfb": (headers_at - start) * 1000,
+        "first_token": (first_at - start) * 1000 if first_at else None,
+    }
+
+
+def _probe_socket(method, url, headers, body, marker, timeout):
+    """Probe with raw sockets so connect and TLS handshake can be timed separately"""
+    parts = urlsplit(url)
+    secure = parts.scheme == "https"
+    port = parts.port or (443 if secure else 80)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+
+    start = time.perf_counter()
+    sock = socket.create_connection((parts.hostname, port), timeout=timeout)
+    connect_at = time.perf_counter()
+    tls = 0.0
+    if secure:
+        sock = ssl.create_default_context().wrap_socket(sock, server_hostname=parts.hostname)
+        tls = (time.perf_counter() - connect_at) * 1000
+
+    conn = http.client.HTTPConnection(parts.hostname, port, timeout=timeout)
+    conn.sock = sock
+    try:
+        conn.request(method, path, body=body, headers=headers)
+        response = conn.getresponse()
+        headers_at = time.perf_counter()
+        first_at = None
+        if marker and response.status == 200:
+            while True:
+                line = response.readline()
+                if not line:
+                    break
+                if marker.encode() in line:
+                    first_at = time.perf_counter()
+                    break
+        status = response.status
+    finally:
+        conn.close()
+
+    return {
+        "status": status,
+        "connect": (connect_at - start) * 1000,
+        "tls": tls,
+        "ttfb": (headers_at - start) * 1000,
+        "first_token": (first_at - start) * 1000 if first_at else None,
+    }
+
+
+def probe_once(method, url, headers, body, marker=None, timeout=DEFAULT_TIMEOUT):
+    probe = _probe_httpx if httpx is not None else _probe_socket
+    return probe(method, url, headers, body, marker, timeout)
+
+
+def probe(name, method, url, headers, body, ok, marker=None, runs=DEFAULT_RUNS, timeout=DEFAULT_TIMEOUT):
+    """Run `runs` fresh-connection probes. `ok(sample)` decides if a run succeeded."""
+    samples, errors = [], []
+    for _ in range(runs):
+        try:
+            sample = probe_once(method, url, headers, body, marker, timeout)
+        except Exception as e:  # OSError / http.client or httpx errors
+            errors.append(f"{type(e).__name__}: {e}")
+            continue
+        if ok(sample):
+            samples.append(sample)
+        else:
+            errors.append(f"HTTP {sample['status']}")
+    return {
+        "name": name,
+        "url": url,
+        "runs": runs,
+        "samples": samples,
+        "errors": errors,
+        "healthy": len(samples) >= max(1, runs * HEALTHY_RATIO),
+    }
+
+
+def probe_webhook(url, runs=DEFAULT_RUNS, timeout=DEFAULT_TIMEOUT, name="feishu webhook", headers=None):
+    """Probe a webhook channel. An empty body is rejected by Feishu/Lark, so no message is posted."""
+    result = probe(
+        name, "POST", url,
+        {"Content-Type": "application/json", **(headers or {})}, b"{}",
+        ok=lambda s: s["status"] < 500, runs=runs, timeout=timeout,
+    )
+    result["channel"] = name
+    return result
+
+
+def probe_endpoint(base_url, model, api_key, runs=DEFAULT_RUNS, timeout=DEFAULT_TIMEOUT):
+    """Probe an Anthropic-compatible endpoint with a 1-token streaming request"""
+    body = json.dumps({
+        "model": model,
+        "max_tokens": 1,
+        "stream": True,
+        "messages": [{"role": "user", "content": "ping"}],
+    }).encode()
+    headers = {
+        "Content-Type": "application/json",
+        "x-api-key": api_key or "",
+        "anthropic-version": ANTHROPIC_VERSION,
+    }
+    result = probe(
+        model, "POST", base_url.rstrip("/") + "/v1/messages", headers, body,
+        ok=lambda s: s["status"] == 200 and s["first_token"] is not None,
+        marker=FIRST_TOKEN_MARKER, runs=runs, timeout=timeout,
+    )
+    result.update({"base_url": base_url, "model": model})
+    return result
+
+
+def summarize(result, field):
+    values = [s[field] for s in result["samples"] if s.get(field) is not None]
+    if not values:
+        return None
+    return percentile(values, 50), percentile(values, 90)
+
+
+def format_ms(pair):
+    return f"{pair[0]:6.0f} / {pair[1]:6.0f}" if pair else f"{'-':>6} / {'-':>6}"
+
+
+def print_report(results):
+    print(f"\n{BOLD}{'endpoint':<44} {'ok':>5}  {'connect p50/p90':>15}  {'tls p50/p90':>15}  {'first token p50/p90':>19}{RESET}")
+    for r in results:
+        label = r.get("base_url", r["url"])
+        label = (label[:41] + "...") if len(label) > 44 else label
+        color = GREEN if r["healthy"] else RED
+        first = summarize(r, "first_token") or summarize(r, "ttfb")
+        print(f"{label:<44} {color}{len(r['samples']):>2}/{r['runs']:<2}{RESET}  "
+              f"{format_ms(summarize(r, 'connect')):>15}  {format_ms(summarize(r, 'tls')):>15}  {format_ms(first):>19}")
+        if r.get("model"):
+            print(f"  {CYAN}model: {r['model']}{RESET}")
+        if r.get("channel"):
+            print(f"  {CYAN}channel: {r['channel']}{RESET}")
+        if r["errors"]:
+            print(f"  {YELLOW}errors: {'; '.join(sorted(set(r['errors'])))}{RESET}")
+    if httpx is None:
+        print(f"\n{YELLOW}httpx 未安装: 直连探测，未经过代理{RESET}")
+
+
+def pick_fastest(results):
+    """Fastest healthy endpoint by median first-token latency, or None"""
+    healthy = [r for r in results if r["healthy"] and "base_url" in r]
+    if not healthy:
+        return None
+    return min(healthy, key=lambda r: summarize(r, "first_token")[0])
+
+
+def gather_candidates(config, extra=()):
+    """Current compress endpoint + compress.candidates + extra (base_url, model) pairs"""
+    compress_cfg = config.get("compress", {})
+    default_key = compress_cfg.get("api_key", "$GAAP_API_KEY")
+    candidates = []
+    if compress_cfg.get("base_url"):
+        candidates.append({
+            "base_url": compress_cfg["base_url"],
+            "model": compress_cfg.get("model", "claude-3-haiku-20240307"),
+            "api_key": default_key,
+        })
+    for c in compress_cfg.get("candidates", []):
+        if isinstance(c, dict) and c.get("base_url") and c.get("model"):
+            candidates.append({"api_key": default_key, **c})
+    for base_url, model in extra:
+        candidates.append({"base_url": base_url, "model": model, "api_key": default_key})
+
+    # Dedup on (base_url, model), keep first
+    seen, unique = set(), []
+    for c in candidates:
+        key = (c["base_url"].rstrip("/"), c["model"])
+        if key not in seen:
+            seen.add(key)
+            unique.append(c)
+    return unique
+
+
+def find_webhooks(config):
+    """[(name, url, headers)] for the feishu / lark / webhook channels deliver.py posts to.
+
+    Same channel list as deliver.py (the legacy FEISHU_WEBHOOK_URL /
+    .claude/feishu-webhook-url if gaap.json has no channels), with $ENV values
+    resolved. url is None when its variable is unset.
+    """
+    webhooks, seen = [], set()
+    for index, channel in enumerate(load_channels(config)):
+        if channel.get("type", "feishu") not in WEBHOOK_CHANNEL_TYPES:
+            continue
+        url = resolve_value(channel.get("url"))
+        if url in seen:
+            continue
+        seen.add(url)
+        headers = {k: resolve_value(v) or "" for k, v in channel.get("headers", {}).items()}
+        webhooks.append((channel_name(channel, index), url, headers))
+    return webhooks
+
+
+def run_doctor(runs=DEFAULT_RUNS, timeout=DEFAULT_TIMEOUT, extra=(), write=False):
+    """Probe everything and print the report.
+
+    Returns (fastest healthy candidate or None, number of candidates probed).
+    """
+    load_env()
+    config = load_config()
+    results = []
+
+    webhooks = find_webhooks(config)
+    for name, url, headers in webhooks:
+        if not url:
+            print(f"{YELLOW}渠道 {name} 的 url 未设置 (环境变量为空)，跳过{RESET}")
+            continue
+        print(f"探测 Webhook {name} ({runs} 次)...")
+        results.append(probe_webhook(url, runs, timeout, name, headers))
+    if not webhooks:
+        print(f"{YELLOW}未配置 FEISHU_WEBHOOK_URL 或 Webhook 渠道，跳过 Webhook 探测{RESET}")
+
+    candidates = gather_candidates(config, extra)
+    for c in candidates:
+        print(f"探测 {c['base_url']} ({c['model']}, {runs} 次)...")
+        results.append(probe_endpoint(c["base_url"], c["model"], resolve_value(c["api_key"]), runs, timeout))
+
+    print_report(results)
+
+    best = pick_fastest(results)
+    if not candidates:
+        print(f"\n{YELLOW}没有 LLM 端点可探测 (llm_mode none 或未配置 compress){RESET}")
+    elif best is None:
+        print(f"\n{RED}✗ 没有健康的 LLM 端点{RESET}")
+    else:
+        print(f"\n{GREEN}✓ 最快的健康端点: {best['base_url']} ({best['model']}){RESET}")
+        if write:
+            apply_choice(config, candidates, best)
+            print(f"{GREEN}✓ 已写入 {CONFIG_PATH}{RESET}")
+    return best, len(candidates)
+
+
+def apply_choice(config, candidates, best):
+    """Make `best` the compress endpoint; keep every candidate for the next probe"""
+    compress_cfg = config.setdefault("compress", {})
+    chosen = next(c for c in candidates
+                  if c["base_url"] == best["base_url"] and c["model"] == best["model"])
+    compress_cfg["base_url"] = chosen["base_url"]
+    compress_cfg["model"] = chosen["model"]
+    compress_cfg["api_key"] = chosen["api_key"]
+    compress_cfg["candidates"] = [c for c in candidates if c is not chosen]
+    save_config(config)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GAAP endpoint latency doctor")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="probes per endpoint")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="seconds per probe")
+    parser.add_argument("--candidate", nargs=2, action="append", default=[], metavar=("BASE_URL", "MODEL"),
+                        help="extra Anthropic-compatible endpoint to probe")
+    parser.add_argument("--write", action="store_true", help="save the fastest healthy endpoint to gaap.json")
+    args = parser.parse_args()
+
+    best, probed = run_doctor(args.runs, args.timeout, args.candidate, args.write)
+    sys.exit(1 if probed and best is None else 0)
+
+
+if __name__ == "__main__":
+    main()
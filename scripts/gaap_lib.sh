@@ -0,0 +1,95 @@
+#!/bin/bash
+###############################################################################
+# GAAP - Shared Hook Helpers
+# Sourced by notify.sh / permission_notify.sh / question_notify.sh after they
+# have parsed CWD and set SCRIPT_DIR:
+#   . "$SCRIPT_DIR/gaap_lib.sh"
+###############################################################################
+
+CONFIG_FILE="$CWD/.claude/gaap.json"
+
+# Helper: string value of a top-level key in gaap.json (grep, no Python)
+# Usage: config_value <key>
+config_value() {
+    grep -o "\"$1\"[[:space:]]*:[[:space:]]*\"[^\"]*\"" "$CONFIG_FILE" 2>/dev/null | \
+        sed "s/\"$1\"[[:space:]]*:[[:space:]]*\"//;s/\"\$//" || true
+}
+
+# Helper: set PYTHON / RUNTIME_PATH / PYTHON_FLAGS from gaap.json (saved by
+# install_hooks.py), falling back to the system python3
+# Usage: load_python [flags_key]   (python_flags by default)
+load_python() {
+    local flags_key="${1:-python_flags}"
+    PYTHON=""
+    RUNTIME_PATH=""
+    PYTHON_FLAGS=""
+    if [ -f "$CONFIG_FILE" ]; then
+        local python_path=$(config_value python_path)
+        if [ -n "$python_path" ] && [ -x "$python_path" ]; then
+            PYTHON="$python_path"
+            # Precompiled runtime (built by install_hooks.py for this interpreter)
+            RUNTIME_PATH=$(config_value runtime_path)
+            PYTHON_FLAGS=$(config_value "$flags_key")
+        fi
+    fi
+    [ -z "$PYTHON" ] && command -v python3 &>/dev/null && PYTHON="python3"
+    return 0
+}
+
+# Helper: run a GAAP script, via the precompiled runtime when it is current
+# (built for this Python from these scripts, see gaap_runtime.py)
+# Usage: run_gaap <script_name> [args...]
+run_gaap() {
+    local name="$1"
+    shift
+    if [ -n "$RUNTIME_PATH" ] && [ "$RUNTIME_PATH" -nt "$SCRIPT_DIR/$name.py" ]; then
+        # Flags are intentionally unquoted (e.g. "-I -S")
+        "$PYTHON" $PYTHON_FLAGS "$RUNTIME_PATH" "$name" "$@"
+        local status=$?
+        # 3 = stale runtime, exited before reading stdin
+        [ $status -ne 3 ] && return $status
+    fi
+    if [ -n "$RUNTIME_PATH" ]; then
+        echo "[$(date '+%Y-%m-%d %H:%M:%S')] RUNTIME: $RUNTIME_PATH is stale, running $name.py (rerun install_hooks.py)" >> "$CWD/.claude/.gaap_trace.log" 2>/dev/null
+    fi
+    "$PYTHON" "$SCRIPT_DIR/$name.py" "$@"
+}
+
+# Helper: grace delay (seconds) for this event from the "defer" object in gaap.json,
+# e.g. "defer": {"Stop": 30, "PermissionRequest": 15}. Prints 0 if none is configured.
+get_defer_seconds() {
+    if [ -z "$HOOK_EVENT" ] || ! grep -q '"defer"' "$CONFIG_FILE" 2>/dev/null; then
+        echo 0
+        return
+    fi
+    "$PYTHON" -I -S -c '
+import json, sys
+try:
+    seconds = float(json.load(open(sys.argv[1]))["defer"].get(sys.argv[2], 0))
+except Exception:
+    seconds = 0
+print(f"{max(seconds, 0):g}")
+' "$CONFIG_FILE" "$HOOK_EVENT" 2>/dev/null || echo 0
+}
+
+# Helper: hold a notification for DEFER_SECONDS in the background, then run "$@"
+# unless the session became active in the meantime (cancel_pending.sh or watcher.py
+# removes the marker on a user prompt / tool result) or a newer event replaced it
+# Usage: schedule_notification <command> [args...]
+schedule_notification() {
+    local marker="$CWD/.claude/.gaap_pending/$SESSION_ID"
+    local token="$$.$(date +%s%N)"
+    mkdir -p "$(dirname "$marker")"
+    echo "$token" > "$marker"
+    echo "[$(date '+%Y-%m-%d %H:%M:%S')] DEFER: ${DEFER_SECONDS}s for $HOOK_EVENT (session $SESSION_ID)" >> "$CWD/.claude/.gaap_trace.log" 2>/dev/null
+    (
+        sleep "$DEFER_SECONDS"
+        if [ "$(cat "$marker" 2>/dev/null)" != "$token" ]; then
+            echo "[$(date '+%Y-%m-%d %H:%M:%S')] DEFER: cancelled $HOOK_EVENT (session $SESSION_ID)" >> "$CWD/.claude/.gaap_trace.log" 2>/dev/null
+            exit 0
+        fi
+        rm -f "$marker"
+        "$@"
+    ) < /dev/null > /dev/null 2>&1 &
+    disown
+}
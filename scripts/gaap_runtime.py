@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+GAAP - Runtime Entry Point
+
+Dispatches `gaap.pyz <script> [args...]` to one of the runtime scripts, e.g.
+`gaap.pyz get_session_title <transcript_path> <cwd>`.
+
+install_hooks.py stores this file as __main__.py (source, so it loads under
+any Python) in the zipapp, next to the RUNTIME_MODULES bytecode and a
+gaap_build.py fingerprint. It can also be run directly from the scripts
+directory.
+
+Exits with RUNTIME_STALE, before reading stdin and without output (callers
+capture stderr), when the archive was built for another Python or from older
+scripts; the hooks then run the .py script instead.
+"""
+
+import importlib
+import importlib.util
+import os
+import sys
+
+# Scripts bundled into gaap.pyz (module name == script file name without .py)
+RUNTIME_MODULES = ["get_session_title", "compress", "deliver", "governor", "recorder", "transcript"]
+
+RUNTIME_STALE = 3
+
+
+def newest_source_mtime(scripts_dir):
+    """Latest modification time of the runtime's .py sources"""
+    return max(os.stat(os.path.join(scripts_dir, f"{m}.py")).st_mtime
+               for m in ["gaap_runtime"] + RUNTIME_MODULES)
+
+
+def stale_reason():
+    """Why this archive can't be used, or None if it is current"""
+    try:
+        import gaap_build
+    except ImportError:
+        return None  # Running from the scripts directory
+    if gaap_build.MAGIC != importlib.util.MAGIC_NUMBER.hex():
+        return f"built for Python {gaap_build.PYTHON_VERSION}, running {sys.version.split()[0]}"
+    try:
+        if newest_source_mtime(gaap_build.SCRIPTS_DIR) > gaap_build.SOURCES_MTIME:
+            return "scripts changed since build (plugin updated)"
+    except OSError:
+        pass  # Scripts moved away: the archive is self-contained
+    return None
+
+
+def exit_stale(message):
+    if sys.stderr.isatty():
+        print(f"{message}, rerun install_hooks.py", file=sys.stderr)
+    sys.exit(RUNTIME_STALE)
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in RUNTIME_MODULES:
+        print(f"Usage: gaap.pyz <{'|'.join(RUNTIME_MODULES)}> [args...]", file=sys.stderr)
+        sys.exit(2)
+
+    # Isolated mode (-I) doesn't prepend the script dir for plain .py launches
+    here = os.path.dirname(os.path.abspath(__file__))
+    if here not in sys.path:
+        sys.path.insert(0, here)
+
+    reason = stale_reason()
+    if reason:
+        exit_stale(f"gaap.pyz is stale ({reason})")
+
+    name = sys.argv.pop(1)
+    sys.argv[0] = f"{name}.py"
+    try:
+        module = importlib.import_module(name)
+    except ImportError as e:
+        # e.g. bytecode the interpreter can't load
+        exit_stale(f"gaap.pyz can't load {name} ({e})")
+    module.main()
+
+
+if __name__ == "__main__":
+    main()
@@ -14,25 +14,7 @@ import re
 import time
 from pathlib import Path
 
-# Check required packages
-MISSING_PACKAGES = []
-
-try:
-    import anthropic
-except ImportError:
-    anthropic = None
-    MISSING_PACKAGES.append("anthropic")
-
-try:
-    import httpx
-    try:
-        import socksio
-    except ImportError:
-        MISSING_PACKAGES.append("httpx[socks]")
-except ImportError:
-    MISSING_PACKAGES.append("httpx[socks]")
-
-# Note: We don't exit on missing packages here - fallback to UUID titles instead
+import transcript
 
 # Project-level config (via GAAP_PROJECT_DIR env var)
 PROJECT_DIR = os.environ.get("GAAP_PROJECT_DIR", ".")
@@ -125,10 +107,49 @@ def resolve_api_key(key_str):
     return key_str
 
 
-def call_api(base_url, api_key, model, message, lang="zh"):
+def report_call(config, model, request, response, elapsed):
+    """Feed the governor and recorder (None response = failed call).
+
+    Both are imported only when configured, to keep hook startup lean.
+    """
+    config = config or {}
+    usage = response.usage if response is not None else None
+    if "governor" in config:
+        import governor
+        governor.record_call(config, elapsed, usage)
+    if config.get("record") not in (None, False):
+        import recorder
+        text = response.content[0].text if response is not None else None
+        recorder.record_provider(config, "title", model, request, text, usage, elapsed)
+
+
+def import_sdk():
+    """
+    Import the Anthropic SDK on first need (it dominates startup time).
+    Returns (anthropic module or None, missing package names).
+    """
+    missing = []
+    try:
+        import anthropic
+    except ImportError:
+        anthropic = None
+        missing.append("anthropic")
+
+    try:
+        import httpx  # noqa: F401
+        try:
+            import socksio  # noqa: F401
+        except ImportError:
+            missing.append("httpx[socks]")
+    except ImportError:
+        missing.append("httpx[socks]")
+
+    return anthropic, missing
+
+
+def call_api(base_url, api_key, model, message, lang="zh", config=None):
     """Call Anthropic-compatible API using SDK (handles /v1/messages automatically)"""
-    if not anthropic:
-        return None
+    import anthropic
 
     client = anthropic.Anthropic(
         api_key=api_key,
@@ -138,11 +159,17 @@ def call_api(base_url, api_key, model, message, lang="zh"):
 
     prompt = TITLE_PROMPTS.get(lang, TITLE_PROMPTS["zh"]) + message
 
-    response = client.messages.create(
-        model=model,
-        max_tokens=50,
-        messages=[{"role": "user", "content": prompt}]
-    )
+    start = time.monotonic()
+    try:
+        response = client.messages.create(
+            model=model,
+            max_tokens=50,
+            messages=[{"role": "user", "content": prompt}]
+        )
+    except Exception:
+        report_call(config, model, prompt, None, time.monotonic() - start)
+        raise
+    report_call(config, model, prompt, response, time.monotonic() - start)
 
     title = response.content[0].text.strip()
     # Clean quotes if present
@@ -153,37 +180,15 @@ def call_api(base_url, api_key, model, message, lang="zh"):
 def extract_first_message(transcript_path):
     """Extract first meaningful user message from transcript
 
-    Supports both old and new transcript formats:
-    - Old: {"type":"user","message":{"content":"..."}}
-    - New: {"message":{"role":"user","content":[{"type":"text","text":"..."}]}}
+    Supports both old and new transcript formats (see transcript.py).
+    Only user prompt lines are decoded; malformed lines are skipped.
     """
     try:
-        with open(transcript_path) as f:
-            for line in f:
-                data = json.loads(line)
-
-                # Try new format: {"message":{"role":"user","content":[...]}}
-                msg = data.get('message', {})
-                if msg.get('role') == 'user':
-                    content = msg.get('content', [])
-                    if isinstance(content, list):
-                        # Extract text from content array
-                        for item in content:
-                            if isinstance(item, dict) and item.get('type') == 'text':
-                                text = item.get('text', '')
-                                if _is_valid_message(text):
-                                    return text[:200]
-                    elif isinstance(content, str) and _is_valid_message(content):
-                        return content[:200]
-
-                # Try old format: {"type":"user","message":{"content":"..."}}
-                if data.get('type') == 'user':
-                    content = msg.get('content', '')
-                    if isinstance(content, str) and _is_valid_message(content):
-                        return content[:200]
-
+        for text in transcript.Transcript(transcript_path).user_texts():
+            if _is_valid_message(text):
+                return text[:200]
         return None
-    except (IOError, json.JSONDecodeError) as e:
+    except IOError as e:
         log_error(f"Failed to extract message from {transcript_path}", e)
         return None
 
@@ -248,12 +253,16 @@ def generate_title(transcript_path, cwd):
     config = load_config()
     title = None
 
-    # Try API if configured (llm_mode is smart or compress_all)
+    # Try API if configured (llm_mode is smart or compress_all, after governor degradation)
     llm_mode = config.get("llm_mode", "none") if config else "none"
+    if config and "governor" in config:
+        import governor
+        llm_mode = governor.effective_mode(config)
     if llm_mode in ["smart", "compress_all"] and first_message:
-        # Check if packages are available
-        if MISSING_PACKAGES:
-            log_error(f"Missing packages for LLM: {', '.join(MISSING_PACKAGES)}. Run: pip install anthropic httpx[socks]")
+        # Check if packages are available (no exit: fall back to a UUID title)
+        anthropic, missing = import_sdk()
+        if missing:
+            log_error(f"Missing packages for LLM: {', '.join(missing)}. Run: pip install anthropic httpx[socks]")
         elif anthropic:
             compress_cfg = config.get("compress", {})
             base_url = compress_cfg.get("base_url", "")
@@ -263,7 +272,7 @@ def generate_title(transcript_path, cwd):
 
             if api_key and base_url:
                 try:
-                    title = call_api(base_url, api_key, model, first_message, lang)
+                    title = call_api(base_url, api_key, model, first_message, lang, config)
                 except anthropic.APIError as e:
                     log_error(f"Anthropic API error for session {session_id}", e)
                 except Exception as e:
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+GAAP - Adaptive LLM Mode Governor
+
+Tracks token usage (from the SDK response `usage`) and LLM latency per host,
+and degrades llm_mode compress_all -> smart -> none when the daily token
+budget or latency SLO configured under "governor" in gaap.json is at risk.
+The configured mode comes back by itself once usage resets (new day) or slow
+samples age out of the latency window. Every switch is appended to
+.claude/.gaap_governor.log for later review.
+"""
+
+import json
+import os
+import socket
+import sys
+import time
+
+# Project-level config (via GAAP_PROJECT_DIR env var)
+PROJECT_DIR = os.environ.get("GAAP_PROJECT_DIR", ".")
+CONFIG_PATH = os.path.join(PROJECT_DIR, ".claude/gaap.json")
+STATE_PATH = os.path.join(PROJECT_DIR, ".claude/.gaap_governor.json")
+SWITCH_LOG_PATH = os.path.join(PROJECT_DIR, ".claude/.gaap_governor.log")
+ERROR_LOG_PATH = os.path.join(PROJECT_DIR, ".claude/.gaap_error.log")
+
+# Cheapest first
+MODES = ["none", "smart", "compress_all"]
+
+DEFAULTS = {
+    "daily_token_budget": 0,    # 0 = no budget
+    "degrade_ratio": 0.8,       # step down one level once this share of the budget is used
+    "latency_slo_ms": 0,        # 0 = no SLO
+    "latency_percentile": 90,
+    "latency_window": 900,      # seconds of latency samples to consider
+    "min_samples": 3,
+}
+MAX_SAMPLES = 200
+
+
+def log_error(message, error=None):
+    """Log errors to a file for debugging"""
+    try:
+        os.makedirs(os.path.dirname(ERROR_LOG_PATH), exist_ok=True)
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        error_detail = f": {type(error).__name__}: {error}" if error else ""
+        with open(ERROR_LOG_PATH, 'a') as f:
+            f.write(f"[{timestamp}] governor.py: {message}{error_detail}\n")
+    except Exception:
+        pass  # Don't fail if we can't write to log
+
+
+def load_config():
+    if not os.path.exists(CONFIG_PATH):
+        return None
+    try:
+        with open(CONFIG_PATH, 'r') as f:
+            return json.load(f)
+    except (IOError, json.JSONDecodeError) as e:
+        log_error(f"Failed to load config from {CONFIG_PATH}", e)
+        return None
+
+
+def governor_settings(config):
+    """Merged governor settings, or None if the governor is not configured"""
+    gov_cfg = (config or {}).get("governor")
+    if not isinstance(gov_cfg, dict):
+        return None
+    return {**DEFAULTS, **gov_cfg}
+
+
+def host_name():
+    return socket.gethostname().split(".")[0] or "?"
+
+
+def load_state():
+    if not os.path.exists(STATE_PATH):
+        return {}
+    try:
+        with open(STATE_PATH, 'r') as f:
+            return json.load(f)
+    except (IOError, json.JSONDecodeError) as e:
+        log_error(f"Failed to load state from {STATE_PATH}", e)
+        return {}
+
+
+def save_state(state):
+    """Atomic write: concurrent hooks may lose a sample but never corrupt the file"""
+    try:
+        os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+        tmp_path = f"{STATE_PATH}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, STATE_PATH)
+    except IOError as e:
+        log_error(f"Failed to save state to {STATE_PATH}", e)
+
+
+def host_state(state, now):
+    """Per-host entry, with token counters reset at local midnight"""
+    entry = state.setdefault(host_name(), {})
+    today = time.strftime("%Y-%m-%d", time.localtime(now))
+    if entry.get("day") != today:
+        entry.update({"day": today, "input_tokens": 0, "output_tokens": 0, "calls": 0})
+    entry.setdefault("samples", [])
+    return entry
+
+
+def record_call(config, elapsed, usage=None):
+    """Record one LLM call (elapsed seconds, SDK `usage` or None on failure)"""
+    if governor_settings(config) is None:
+        return
+    now = time.time()
+    state = load_state()
+    entry = host_state(state, now)
+    if usage is not None:
+        entry["input_tokens"] += getattr(usage, "input_tokens", 0) or 0
+        entry["output_tokens"] += getattr(usage, "output_tokens", 0) or 0
+    entry["calls"] += 1
+    entry["samples"] = (entry["samples"] + [[int(now), int(elapsed * 1000)]])[-MAX_SAMPLES:]
+    save_state(state)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def decide(configured, settings, entry, now):
+    """Return (mode, reason) for the current usage and latency"""
+    if configured not in MODES:
+        configured = "none"
+    level = MODES.index(configured)
+    reasons = []
+
+    budget = settings["daily_token_budget"]
+    used = entry.get("input_tokens", 0) + entry.get("output_tokens", 0)
+    if budget and used >= budget:
+        return "none", f"daily budget exhausted ({used}/{budget} tokens)"
+    if budget and used >= budget * settings["degrade_ratio"]:
+        level -= 1
+        reasons.append(f"{used}/{budget} tokens used today")
+
+    slo = settings["latency_slo_ms"]
+    recent = [ms for ts, ms in entry.get("samples", []) if now - ts <= settings["latency_window"]]
+    if slo and len(recent) >= settings["min_samples"]:
+        observed = percentile(recent, settings["latency_percentile"])
+        if observed > slo:
+            level -= 1
+            reasons.append(f"p{settings['latency_percentile']} latency {observed}ms > {slo}ms")
+
+    mode = MODES[max(0, level)]
+    return mode, "; ".join(reasons) or "within budget and SLO"
+
+
+def effective_mode(config):
+    """llm_mode to use right now. Records a switch whenever it changes."""
+    configured = (config or {}).get("llm_mode", "none")
+    settings = governor_settings(config)
+    if settings is None or configured == "none":
+        return configured
+
+    now = time.time()
+    state = load_state()
+    entry = host_state(state, now)
+    mode, reason = decide(configured, settings, entry, now)
+
+    previous = entry.get("mode", configured)
+    if mode != previous:
+        log_switch(previous, mode, configured, reason)
+    if entry.get("mode") != mode:
+        entry["mode"] = mode
+        save_state(state)
+    return mode
+
+
+def log_switch(previous, mode, configured, reason):
+    record = {
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "host": host_name(),
+        "from": previous,
+        "to": mode,
+        "configured": configured,
+        "reason": reason,
+    }
+    try:
+        with open(SWITCH_LOG_PATH, 'a') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    except IOError as e:
+        log_error(f"Failed to write {SWITCH_LOG_PATH}", e)
+
+
+def show_status(config):
+    configured = (config or {}).get("llm_mode", "none")
+    settings = governor_settings(config)
+    print(f"Configured llm_mode: {configured}")
+    if settings is None:
+        print("Governor: not configured")
+        return
+
+    now = time.time()
+    entry = host_state(load_state(), now)
+    mode, reason = decide(configured, settings, entry, now)
+    used = entry["input_tokens"] + entry["output_tokens"]
+    budget = settings["daily_token_budget"] or "unlimited"
+    print(f"Effective llm_mode:  {mode} ({reason})")
+    print(f"Host {host_name()} today: {entry['calls']} calls, {used} tokens (budget {budget})")
+
+    if os.path.exists(SWITCH_LOG_PATH):
+        with open(SWITCH_LOG_PATH, 'r') as f:
+            history = f.readlines()[-10:]
+        print("\nRecent switches:")
+        for line in history:
+            try:
+                r = json.loads(line)
+                print(f"  {r['time']} {r['host']}: {r['from']} -> {r['to']} ({r['reason']})")
+            except (ValueError, KeyError):
+                continue
+
+
+def main():
+    """
+    Usage: governor.py mode    - print the llm_mode to use now
+           governor.py status  - show usage, effective mode and recent switches
+    """
+    command = sys.argv[1] if len(sys.argv) > 1 else "mode"
+    config = load_config()
+    if command == "status":
+        show_status(config)
+    else:
+        print(effective_mode(config))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,18 +3,38 @@
 GAAP - Install hooks to project .claude/settings.json
 Workaround for Claude Code bug: plugin hooks don't execute
 
-Also saves current Python path for hook execution.
+Also saves current Python path for hook execution, and builds a precompiled
+zipapp of the GAAP runtime so each hook pays the minimum interpreter startup.
 """
 
+import importlib.util
 import json
 import os
+import py_compile
+import statistics
+import subprocess
 import sys
+import tempfile
+import time
+import zipfile
 
 # Find plugin root
 PLUGIN_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 PROJECT_DIR = os.getcwd()
 SETTINGS_PATH = os.path.join(PROJECT_DIR, ".claude/settings.json")
 CONFIG_PATH = os.path.join(PROJECT_DIR, ".claude/gaap.json")
+SCRIPTS_DIR = os.path.join(PLUGIN_ROOT, "scripts")
+RUNTIME_PATH = os.path.join(PROJECT_DIR, ".claude/gaap.pyz")
+
+sys.path.insert(0, SCRIPTS_DIR)
+from gaap_runtime import RUNTIME_MODULES, newest_source_mtime
+
+# Interpreter flags to try for LLM modes, fastest first. Each must still import the SDK.
+LLM_FLAG_CANDIDATES = ["-I", "-E -s", "-E", ""]
+# llm_mode none needs no third-party packages, so site-packages can be skipped entirely
+LEAN_FLAGS = "-I -S"
+LLM_PACKAGES = "import anthropic, httpx, socksio"
+STARTUP_RUNS = 7
 
 HOOKS_CONFIG = {
     "PermissionRequest": [
@@ -52,6 +72,30 @@ HOOKS_CONFIG = {
                 }
             ]
         }
+    ],
+    # Cancel deferred notifications once the user is active again
+    "UserPromptSubmit": [
+        {
+            "hooks": [
+                {
+                    "type": "command",
+                    "command": f"{PLUGIN_ROOT}/scripts/cancel_pending.sh",
+                    "timeout": 5
+                }
+            ]
+        }
+    ],
+    "PostToolUse": [
+        {
+            "matcher": "",
+            "hooks": [
+                {
+                    "type": "command",
+                    "command": f"{PLUGIN_ROOT}/scripts/cancel_pending.sh",
+                    "timeout": 5
+                }
+            ]
+        }
     ]
 }
 
@@ -60,7 +104,7 @@ def is_gaap_hook(hook_entry):
     """Check if a hook entry is from GAAP"""
     for h in hook_entry.get("hooks", []):
         cmd = h.get("command", "")
-        if "gaap" in cmd.lower() or "notify.sh" in cmd or "permission_notify.sh" in cmd:
+        if "gaap" in cmd.lower() or "notify.sh" in cmd or "cancel_pending.sh" in cmd:
             return True
     return False
 
@@ -108,6 +152,114 @@ def save_python_path():
     return python_path
 
 
+def build_runtime():
+    """Build .claude/gaap.pyz: bytecode-only zipapp of the runtime scripts.
+
+    Modules are stored as sourceless .pyc at the archive root, so there are no
+    staleness checks at import time. __main__.py stays source and checks the
+    gaap_build.py fingerprint (Python magic number, newest script mtime)
+    instead, so hooks fall back to the .py scripts after a Python or GAAP
+    update until this is rerun.
+    """
+    os.makedirs(os.path.dirname(RUNTIME_PATH), exist_ok=True)
+    tmp_path = RUNTIME_PATH + ".tmp"
+    build_info = (
+        f"MAGIC = {importlib.util.MAGIC_NUMBER.hex()!r}\n"
+        f"PYTHON_VERSION = {sys.version.split()[0]!r}\n"
+        f"SCRIPTS_DIR = {SCRIPTS_DIR!r}\n"
+        f"SOURCES_MTIME = {newest_source_mtime(SCRIPTS_DIR)!r}\n"
+    )
+    with tempfile.TemporaryDirectory() as build_dir:
+        with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_STORED) as zf:
+            zf.write(os.path.join(SCRIPTS_DIR, "gaap_runtime.py"), "__main__.py")
+            zf.writestr("gaap_build.py", build_info)
+            for module in RUNTIME_MODULES:
+                cfile = os.path.join(build_dir, f"{module}.pyc")
+                py_compile.compile(
+                    os.path.join(SCRIPTS_DIR, f"{module}.py"),
+                    cfile=cfile,
+                    dfile=f"{module}.py",
+                    doraise=True,
+                    optimize=1,
+                )
+                zf.write(cfile, f"{module}.pyc")
+    os.replace(tmp_path, RUNTIME_PATH)
+    return RUNTIME_PATH
+
+
+def run_quiet(cmd, env=None):
+    try:
+        return subprocess.run(cmd, env=env, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                              stderr=subprocess.DEVNULL, timeout=30).returncode == 0
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+
+
+def detect_llm_flags():
+    """Find the most isolated flags under which the LLM packages still import"""
+    python = sys.executable
+    if not run_quiet([python, "-c", LLM_PACKAGES]):
+        # Packages not installed at all - flags can't make things worse
+        return LLM_FLAG_CANDIDATES[0]
+    for flags in LLM_FLAG_CANDIDATES:
+        if run_quiet([python, *flags.split(), "-c", LLM_PACKAGES]):
+            return flags
+    return ""
+
+
+def measure_startup(cmd):
+    """Median wall time (ms) of a cold title lookup, run in a scratch project dir"""
+    samples = []
+    with tempfile.TemporaryDirectory() as scratch:
+        env = dict(os.environ, GAAP_PROJECT_DIR=scratch)
+        for _ in range(STARTUP_RUNS):
+            start = time.perf_counter()
+            if not run_quiet(cmd + [os.path.join(scratch, "missing.jsonl"), scratch], env=env):
+                return None
+            samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def install_runtime():
+    """Build the zipapp, pick interpreter flags and report cold-start times"""
+    python = sys.executable
+    before = measure_startup([python, os.path.join(SCRIPTS_DIR, "get_session_title.py")])
+
+    try:
+        runtime_path = build_runtime()
+    except (OSError, py_compile.PyCompileError) as e:
+        print(f"\n✗ Failed to build runtime ({type(e).__name__}: {e}), hooks will run .py scripts")
+        return
+
+    llm_flags = detect_llm_flags()
+    lean_flags = LEAN_FLAGS
+    lean = measure_startup([python, *lean_flags.split(), runtime_path, "get_session_title"])
+    if lean is None:
+        lean_flags = llm_flags
+    after = measure_startup([python, *llm_flags.split(), runtime_path, "get_session_title"])
+
+    config = load_config()
+    if after is None:
+        # Runtime doesn't work with this interpreter - keep plain scripts
+        config.pop("runtime_path", None)
+        save_config(config)
+        print("\n✗ Runtime self-test failed, hooks will run .py scripts")
+        return
+
+    config["runtime_path"] = runtime_path
+    config["python_flags"] = llm_flags
+    config["python_flags_lean"] = lean_flags
+    save_config(config)
+
+    print(f"\n✓ Runtime built: {runtime_path}")
+    print(f"  Flags: '{llm_flags}' (LLM modes), '{lean_flags}' (llm_mode none)")
+    print(f"  Cold start per hook call (median of {STARTUP_RUNS} runs):")
+    print(f"    before (.py scripts):  {before:.0f} ms" if before is not None else "    before (.py scripts):  failed")
+    print(f"    after  (LLM modes):    {after:.0f} ms")
+    if lean is not None:
+        print(f"    after  (llm_mode none): {lean:.0f} ms")
+
+
 def main():
     print(f"Project dir: {PROJECT_DIR}")
     print(f"Plugin root: {PLUGIN_ROOT}")
@@ -148,6 +300,9 @@ def main():
     python_path = save_python_path()
     print(f"\n✓ Python path saved: {python_path}")
 
+    # Precompiled runtime for faster hook startup
+    install_runtime()
+
 
 if __name__ == "__main__":
     main()
@@ -31,40 +31,42 @@ WEBHOOK_URL=""
 [ -z "$WEBHOOK_URL" ] && [ -n "$CWD" ] && [ -f "$CWD/.claude/feishu-webhook-url" ] && \
     WEBHOOK_URL=$(cat "$CWD/.claude/feishu-webhook-url" 2>/dev/null | tr -d '\n')
 
+# Multi-channel delivery configured in gaap.json (see deliver.py)
+HAS_CHANNELS=false
+[ -n "$CWD" ] && grep -q '"channels"' "$CWD/.claude/gaap.json" 2>/dev/null && HAS_CHANNELS=true
+
 # DEBUG: trace webhook loading
-echo "[$(date '+%Y-%m-%d %H:%M:%S')] CWD=$CWD, WEBHOOK_URL set=${WEBHOOK_URL:+yes}" >> "${CWD:-.}/.claude/.gaap_trace.log" 2>/dev/null || true
-[ -z "$WEBHOOK_URL" ] && echo "[$(date '+%Y-%m-%d %H:%M:%S')] EXIT: no webhook URL" >> "${CWD:-.}/.claude/.gaap_trace.log" 2>/dev/null && exit 0
+echo "[$(date '+%Y-%m-%d %H:%M:%S')] CWD=$CWD, WEBHOOK_URL set=${WEBHOOK_URL:+yes}, channels=$HAS_CHANNELS" >> "${CWD:-.}/.claude/.gaap_trace.log" 2>/dev/null || true
+[ -z "$WEBHOOK_URL" ] && [ "$HAS_CHANNELS" = false ] && echo "[$(date '+%Y-%m-%d %H:%M:%S')] EXIT: no webhook URL" >> "${CWD:-.}/.claude/.gaap_trace.log" 2>/dev/null && exit 0
 
 # Parse hook input
 PERMISSION_MODE=$(echo "$input" | grep -o '"permission_mode":"[^"]*"' | sed 's/"permission_mode":"//;s/"$//' || echo "default")
 TRANSCRIPT_PATH=$(echo "$input" | grep -o '"transcript_path":"[^"]*"' | sed 's/"transcript_path":"//;s/"$//' || true)
+HOOK_EVENT=$(echo "$input" | grep -o '"hook_event_name":"[^"]*"' | sed 's/"hook_event_name":"//;s/"$//' || true)
+SESSION_ID=$(echo "$input" | grep -o '"session_id":"[^"]*"' | sed 's/"session_id":"//;s/"$//' || true)
 
 # Load config from gaap.json
-LLM_MODE="none"
-PYTHON=""
-CONFIG_FILE="$CWD/.claude/gaap.json"
-if [ -f "$CONFIG_FILE" ]; then
-    LLM_MODE=$(grep -o '"llm_mode"[[:space:]]*:[[:space:]]*"[^"]*"' "$CONFIG_FILE" | sed 's/"llm_mode"[[:space:]]*:[[:space:]]*"//;s/"$//' || echo "none")
-    [ -z "$LLM_MODE" ] && LLM_MODE="none"
-    # Get Python path (saved by install_hooks.py)
-    PYTHON_PATH=$(grep -o '"python_path"[[:space:]]*:[[:space:]]*"[^"]*"' "$CONFIG_FILE" | sed 's/"python_path"[[:space:]]*:[[:space:]]*"//;s/"$//' || true)
-    if [ -n "$PYTHON_PATH" ] && [ -x "$PYTHON_PATH" ]; then
-        PYTHON="$PYTHON_PATH"
-    fi
-fi
-
-# Fallback to system python3 if not configured
-if [ -z "$PYTHON" ]; then
-    if command -v python3 &>/dev/null; then
-        PYTHON="python3"
-    fi
+. "$SCRIPT_DIR/gaap_lib.sh"
+LLM_MODE=$(config_value llm_mode)
+[ -z "$LLM_MODE" ] && LLM_MODE="none"
+if [ "$LLM_MODE" = "none" ]; then
+    # No LLM packages needed: skip site-packages entirely
+    load_python python_flags_lean
+else
+    load_python python_flags
 fi
 
-# Helper: send error to Feishu
+# Helper: send error to all configured channels (curl to the legacy webhook if there's no Python)
 send_error() {
     local error_msg="$1"
     local host=$(hostname -s 2>/dev/null || echo "?")
     local msg="[$host|GAAP] ⚠️ $error_msg"
+    echo "[$(date '+%Y-%m-%d %H:%M:%S')] ERROR: $error_msg" >> "${CWD:-.}/.claude/.gaap_trace.log" 2>/dev/null
+    if [ -n "$PYTHON" ]; then
+        echo "⚠️ $error_msg" | GAAP_PROJECT_DIR="$CWD" run_gaap deliver "$host" "GAAP" "error" > /dev/null 2>&1 || true
+        return 0
+    fi
+    [ -z "$WEBHOOK_URL" ] && return 0
     curl -s -X POST "$WEBHOOK_URL" \
         -H "Content-Type: application/json" \
         -d "{\"msg_type\":\"text\",\"content\":{\"text\":\"$msg\"}}" \
@@ -80,12 +82,18 @@ if [ -z "$PYTHON" ]; then
     exit 1
 fi
 
-# Get session title (cached, LLM-generated if API configured)
-SESSION_NAME=$(GAAP_PROJECT_DIR="$CWD" GAAP_API_KEY="$GAAP_API_KEY" "$PYTHON" "$SCRIPT_DIR/get_session_title.py" "$TRANSCRIPT_PATH" "$CWD" 2>&1)
-if [ $? -ne 0 ]; then
-    # Script failed, send error with details
-    send_error "get_session_title.py 失败: $SESSION_NAME"
-    SESSION_NAME=$(basename "$CWD" 2>/dev/null || echo "?")
+# Record full hook payload + transcript snapshot for offline replay (see recorder.py)
+if grep -q '"record"[[:space:]]*:' "$CONFIG_FILE" 2>/dev/null; then
+    export GAAP_RECORD_ID=$(echo "$input" | GAAP_PROJECT_DIR="$CWD" run_gaap recorder event 2>/dev/null)
+fi
+
+# Adaptive governor: may degrade llm_mode under token budget / latency pressure
+if grep -q '"governor"' "$CONFIG_FILE" 2>/dev/null; then
+    GOVERNED_MODE=$(GAAP_PROJECT_DIR="$CWD" run_gaap governor mode 2>/dev/null)
+    if [ -n "$GOVERNED_MODE" ] && [ "$GOVERNED_MODE" != "$LLM_MODE" ]; then
+        echo "[$(date '+%Y-%m-%d %H:%M:%S')] GOVERNOR: llm_mode $LLM_MODE -> $GOVERNED_MODE" >> "$CWD/.claude/.gaap_trace.log"
+        LLM_MODE="$GOVERNED_MODE"
+    fi
 fi
 
 # Check auto-approve mode
@@ -186,14 +194,23 @@ check_dedup() {
     return 0  # not duplicate, proceed
 }
 
-# Send notification
-echo "[$(date '+%Y-%m-%d %H:%M:%S')] SEND_NOTIFICATION=$SEND_NOTIFICATION, USE_LLM_COMPRESS=$USE_LLM_COMPRESS, LLM_MODE=$LLM_MODE" >> "$CWD/.claude/.gaap_trace.log"
-if [ "$SEND_NOTIFICATION" = true ] && check_dedup; then
+# Compress (only now that we know it will be sent) and deliver to all channels
+send_notification() {
+    check_dedup || return 0
+
+    # Session title (cached, LLM-generated if API configured), only now that we are sending
+    SESSION_NAME=$(GAAP_PROJECT_DIR="$CWD" GAAP_API_KEY="$GAAP_API_KEY" run_gaap get_session_title "$TRANSCRIPT_PATH" "$CWD" 2>&1)
+    if [ $? -ne 0 ]; then
+        # Script failed, send error with details
+        send_error "get_session_title.py 失败: $SESSION_NAME"
+        SESSION_NAME=$(basename "$CWD" 2>/dev/null || echo "?")
+    fi
+
     if [ -n "$LAST_CONTENT" ]; then
         if [ "$USE_LLM_COMPRESS" = true ]; then
             # Try to compress message using LLM (fallback to plain text)
-            echo "[$(date '+%Y-%m-%d %H:%M:%S')] Calling compress.py with PYTHON=$PYTHON" >> "$CWD/.claude/.gaap_trace.log"
-            COMPRESS_OUTPUT=$(echo "$LAST_CONTENT" | GAAP_PROJECT_DIR="$CWD" GAAP_API_KEY="$GAAP_API_KEY" "$PYTHON" "$SCRIPT_DIR/compress.py" 2>&1)
+            echo "[$(date '+%Y-%m-%d %H:%M:%S')] Calling compress.py with PYTHON=$PYTHON RUNTIME=${RUNTIME_PATH:-none}" >> "$CWD/.claude/.gaap_trace.log"
+            COMPRESS_OUTPUT=$(echo "$LAST_CONTENT" | GAAP_PROJECT_DIR="$CWD" GAAP_API_KEY="$GAAP_API_KEY" run_gaap compress 2>&1)
             COMPRESS_STATUS=$?
             echo "[$(date '+%Y-%m-%d %H:%M:%S')] compress.py status=$COMPRESS_STATUS, output_len=${#COMPRESS_OUTPUT}" >> "$CWD/.claude/.gaap_trace.log"
             if [ $COMPRESS_STATUS -ne 0 ]; then
@@ -203,27 +220,29 @@ if [ "$SEND_NOTIFICATION" = true ] && check_dedup; then
             else
                 COMPRESSED="$COMPRESS_OUTPUT"
             fi
-            MESSAGE="[$HOST|$SESSION_NAME] $COMPRESSED"
+            MESSAGE="$COMPRESSED"
         else
             # Plain text delivery
-            MESSAGE="[$HOST|$SESSION_NAME] $LAST_CONTENT"
+            MESSAGE="$LAST_CONTENT"
         fi
     else
-        MESSAGE="[$HOST|$SESSION_NAME] 等待输入"
+        MESSAGE="等待输入"
     fi
 
-    # Escape special chars for JSON
-    MESSAGE=$(echo "$MESSAGE" | sed 's/\\/\\\\/g; s/"/\\"/g; s/\t/\\t/g' | tr '\n' ' ')
-
-    for i in 1 2 3; do
-        HTTP_STATUS=$(curl -s -o /dev/null -w "%{http_code}" \
-            -X POST "$WEBHOOK_URL" \
-            -H "Content-Type: application/json" \
-            -d "{\"msg_type\":\"text\",\"content\":{\"text\":\"$MESSAGE\"}}" \
-            --connect-timeout 5 --max-time 10 || echo "000")
-        [ "${HTTP_STATUS:0:1}" = "2" ] && break
-        [ $i -lt 3 ] && sleep 1
-    done
+    # Fan out to all configured channels concurrently (host/session prefix comes from each channel's template)
+    DELIVER_OUTPUT=$(echo "$MESSAGE" | GAAP_PROJECT_DIR="$CWD" run_gaap deliver "$HOST" "$SESSION_NAME" "$HOOK_EVENT" 2>&1)
+    echo "[$(date '+%Y-%m-%d %H:%M:%S')] deliver.py: $(echo "$DELIVER_OUTPUT" | tr '\n' ';')" >> "$CWD/.claude/.gaap_trace.log"
+}
+
+# Send notification (immediately, or held for the per-event grace delay)
+echo "[$(date '+%Y-%m-%d %H:%M:%S')] SEND_NOTIFICATION=$SEND_NOTIFICATION, USE_LLM_COMPRESS=$USE_LLM_COMPRESS, LLM_MODE=$LLM_MODE" >> "$CWD/.claude/.gaap_trace.log"
+if [ "$SEND_NOTIFICATION" = true ]; then
+    DEFER_SECONDS=$(get_defer_seconds)
+    if [ "$DEFER_SECONDS" != 0 ] && [ -n "$SESSION_ID" ]; then
+        schedule_notification send_notification
+    else
+        send_notification
+    fi
 fi
 
 exit 0
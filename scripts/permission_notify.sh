@@ -24,7 +24,8 @@ WEBHOOK_URL=""
 [ -z "$WEBHOOK_URL" ] && [ -n "$CWD" ] && [ -f "$CWD/.claude/feishu-webhook-url" ] && \
     WEBHOOK_URL=$(cat "$CWD/.claude/feishu-webhook-url" 2>/dev/null | tr -d '\n')
 
-[ -z "$WEBHOOK_URL" ] && exit 0
+# Multi-channel delivery configured in gaap.json (see deliver.py)
+[ -z "$WEBHOOK_URL" ] && ! grep -q '"channels"' "$CWD/.claude/gaap.json" 2>/dev/null && exit 0
 
 # Get hostname
 HOST=$(hostname -s 2>/dev/null || hostname 2>/dev/null || echo "?")
@@ -32,23 +33,24 @@ HOST=$(hostname -s 2>/dev/null || hostname 2>/dev/null || echo "?")
 # Extract tool name and session name
 TOOL_NAME=$(echo "$input" | grep -o '"tool_name":"[^"]*"' | sed 's/"tool_name":"//;s/"$//' || echo "?")
 TRANSCRIPT_PATH=$(echo "$input" | grep -o '"transcript_path":"[^"]*"' | sed 's/"transcript_path":"//;s/"$//' || true)
+HOOK_EVENT=$(echo "$input" | grep -o '"hook_event_name":"[^"]*"' | sed 's/"hook_event_name":"//;s/"$//' || true)
+SESSION_ID=$(echo "$input" | grep -o '"session_id":"[^"]*"' | sed 's/"session_id":"//;s/"$//' || true)
 
 # Get Python path from config (saved by install_hooks.py)
-PYTHON=""
-CONFIG_FILE="$CWD/.claude/gaap.json"
-if [ -f "$CONFIG_FILE" ]; then
-    PYTHON_PATH=$(grep -o '"python_path":"[^"]*"' "$CONFIG_FILE" | sed 's/"python_path":"//;s/"$//' || true)
-    [ -n "$PYTHON_PATH" ] && [ -x "$PYTHON_PATH" ] && PYTHON="$PYTHON_PATH"
-fi
-
-# Fallback to system python3
-[ -z "$PYTHON" ] && command -v python3 &>/dev/null && PYTHON="python3"
+. "$SCRIPT_DIR/gaap_lib.sh"
+load_python
 
-# Helper: send error to Feishu
+# Helper: send error to all configured channels (curl to the legacy webhook if there's no Python)
 send_error() {
     local error_msg="$1"
     local host=$(hostname -s 2>/dev/null || echo "?")
     local msg="[$host|GAAP] ⚠️ $error_msg"
+    echo "[$(date '+%Y-%m-%d %H:%M:%S')] ERROR: $error_msg" >> "${CWD:-.}/.claude/.gaap_trace.log" 2>/dev/null
+    if [ -n "$PYTHON" ]; then
+        echo "⚠️ $error_msg" | GAAP_PROJECT_DIR="$CWD" run_gaap deliver "$host" "GAAP" "error" > /dev/null 2>&1 || true
+        return 0
+    fi
+    [ -z "$WEBHOOK_URL" ] && return 0
     curl -s -X POST "$WEBHOOK_URL" \
         -H "Content-Type: application/json" \
         -d "{\"msg_type\":\"text\",\"content\":{\"text\":\"$msg\"}}" \
@@ -61,18 +63,29 @@ if [ -z "$PYTHON" ]; then
     exit 1
 fi
 
-# Get session title (cached, LLM-generated if API configured)
-SESSION_NAME=$(GAAP_PROJECT_DIR="$CWD" GAAP_API_KEY="$GAAP_API_KEY" "$PYTHON" "$SCRIPT_DIR/get_session_title.py" "$TRANSCRIPT_PATH" "$CWD" 2>&1)
-if [ $? -ne 0 ]; then
-    send_error "get_session_title.py 失败: $SESSION_NAME"
-    SESSION_NAME=$(basename "$CWD" 2>/dev/null || echo "?")
+# Record full hook payload + transcript snapshot for offline replay (see recorder.py)
+if grep -q '"record"[[:space:]]*:' "$CONFIG_FILE" 2>/dev/null; then
+    export GAAP_RECORD_ID=$(echo "$input" | GAAP_PROJECT_DIR="$CWD" run_gaap recorder event 2>/dev/null)
 fi
 
-# Send notification
-MESSAGE="[$HOST|$SESSION_NAME] 权限: $TOOL_NAME"
-curl -s -X POST "$WEBHOOK_URL" \
-    -H "Content-Type: application/json" \
-    -d "{\"msg_type\":\"text\",\"content\":{\"text\":\"$MESSAGE\"}}" \
-    --connect-timeout 5 --max-time 10 > /dev/null 2>&1 || true
+# Send notification to all configured channels concurrently
+send_notification() {
+    # Session title (cached, LLM-generated if API configured), only now that we are sending
+    SESSION_NAME=$(GAAP_PROJECT_DIR="$CWD" GAAP_API_KEY="$GAAP_API_KEY" run_gaap get_session_title "$TRANSCRIPT_PATH" "$CWD" 2>&1)
+    if [ $? -ne 0 ]; then
+        send_error "get_session_title.py 失败: $SESSION_NAME"
+        SESSION_NAME=$(basename "$CWD" 2>/dev/null || echo "?")
+    fi
+
+    echo "权限: $TOOL_NAME" | GAAP_PROJECT_DIR="$CWD" run_gaap deliver "$HOST" "$SESSION_NAME" "$HOOK_EVENT" > /dev/null 2>&1 || true
+}
+
+# Hold it for the grace delay if configured: approving the tool (PostToolUse) cancels it
+DEFER_SECONDS=$(get_defer_seconds)
+if [ "$DEFER_SECONDS" != 0 ] && [ -n "$SESSION_ID" ]; then
+    schedule_notification send_notification
+else
+    send_notification
+fi
 
 exit 0
@@ -3,6 +3,8 @@
 # GAAP - AskUserQuestion Notification (Project-level)
 ###############################################################################
 
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+
 # Debug log (for troubleshooting hook execution)
 DEBUG_LOG="${TMPDIR:-/tmp}/gaap_debug.log"
 echo "[$(date '+%Y-%m-%d %H:%M:%S')] AskUserQuestion hook triggered. CLAUDE_PLUGIN_ROOT=${CLAUDE_PLUGIN_ROOT:-not_set}" >> "$DEBUG_LOG"
@@ -21,21 +23,26 @@ WEBHOOK_URL=""
 [ -z "$WEBHOOK_URL" ] && [ -n "$CWD" ] && [ -f "$CWD/.claude/feishu-webhook-url" ] && \
     WEBHOOK_URL=$(cat "$CWD/.claude/feishu-webhook-url" 2>/dev/null | tr -d '\n')
 
-[ -z "$WEBHOOK_URL" ] && exit 0
+# Multi-channel delivery configured in gaap.json (see deliver.py)
+[ -z "$WEBHOOK_URL" ] && ! grep -q '"channels"' "$CWD/.claude/gaap.json" 2>/dev/null && exit 0
 
 # Get hostname
 HOST=$(hostname -s 2>/dev/null || hostname 2>/dev/null || echo "?")
 
-# Get session title (cached, LLM-generated if API configured)
+# Parse hook input
 TRANSCRIPT_PATH=$(echo "$input" | grep -o '"transcript_path":"[^"]*"' | sed 's/"transcript_path":"//;s/"$//' || true)
-SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
-SESSION_NAME=$(GAAP_PROJECT_DIR="$CWD" GAAP_API_KEY="$GAAP_API_KEY" python3 "$SCRIPT_DIR/get_session_title.py" "$TRANSCRIPT_PATH" "$CWD" 2>/dev/null || basename "$CWD" 2>/dev/null || echo "?")
-
-# Send notification
-MESSAGE="[$HOST|$SESSION_NAME] 有问题等你回答"
-curl -s -X POST "$WEBHOOK_URL" \
-    -H "Content-Type: application/json" \
-    -d "{\"msg_type\":\"text\",\"content\":{\"text\":\"$MESSAGE\"}}" \
-    --connect-timeout 5 --max-time 10 > /dev/null 2>&1 || true
+EVENT=$(echo "$input" | grep -o '"hook_event_name":"[^"]*"' | sed 's/"hook_event_name":"//;s/"$//' || true)
+
+# Get Python path from config (saved by install_hooks.py)
+. "$SCRIPT_DIR/gaap_lib.sh"
+load_python
+
+[ -z "$PYTHON" ] && exit 0
+
+# Get session title (cached, LLM-generated if API configured)
+SESSION_NAME=$(GAAP_PROJECT_DIR="$CWD" GAAP_API_KEY="$GAAP_API_KEY" run_gaap get_session_title "$TRANSCRIPT_PATH" "$CWD" 2>/dev/null || basename "$CWD" 2>/dev/null || echo "?")
+
+# Send notification to all configured channels concurrently
+echo "有问题等你回答" | GAAP_PROJECT_DIR="$CWD" run_gaap deliver "$HOST" "$SESSION_NAME" "$EVENT" > /dev/null 2>&1 || true
 
 exit 0
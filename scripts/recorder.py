@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+GAAP - Hook Event Recorder
+
+Records full hook payloads together with a transcript snapshot, a scrubbed
+gaap.json snapshot and the LLM provider responses of the same event, so
+replay.py can feed production traffic back through the pipeline offline.
+
+Enabled by "record" in gaap.json, e.g.
+  "record": {"path": ".claude/gaap_recording.jsonl", "max_transcript_bytes": 1048576}
+"""
+
+import json
+import os
+import sys
+import time
+import uuid
+from collections import deque
+
+# Project-level config (via GAAP_PROJECT_DIR env var)
+PROJECT_DIR = os.environ.get("GAAP_PROJECT_DIR", ".")
+CONFIG_PATH = os.path.join(PROJECT_DIR, ".claude/gaap.json")
+ERROR_LOG_PATH = os.path.join(PROJECT_DIR, ".claude/.gaap_error.log")
+
+DEFAULT_RECORDING_PATH = ".claude/gaap_recording.jsonl"
+DEFAULT_MAX_TRANSCRIPT_BYTES = 1024 * 1024
+# Lines kept from each end of an oversized transcript: the head holds the first
+# user message (session title), the tail the last assistant message (notify.sh)
+SNAPSHOT_HEAD_LINES = 200
+SNAPSHOT_TAIL_LINES = 50
+SECRET_KEYS = ("api_key", "secret", "token")
+
+
+def log_error(message, error=None):
+    """Log errors to a file for debugging"""
+    try:
+        os.makedirs(os.path.dirname(ERROR_LOG_PATH), exist_ok=True)
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        error_detail = f": {type(error).__name__}: {error}" if error else ""
+        with open(ERROR_LOG_PATH, 'a') as f:
+            f.write(f"[{timestamp}] recorder.py: {message}{error_detail}\n")
+    except Exception:
+        pass  # Don't fail if we can't write to log
+
+
+def load_config():
+    if not os.path.exists(CONFIG_PATH):
+        return None
+    try:
+        with open(CONFIG_PATH, 'r') as f:
+            return json.load(f)
+    except (IOError, json.JSONDecodeError) as e:
+        log_error(f"Failed to load config from {CONFIG_PATH}", e)
+        return None
+
+
+def record_settings(config):
+    """Recording settings, or None if recording is off"""
+    record_cfg = (config or {}).get("record")
+    if record_cfg in (None, False):
+        return None  # "record": {} or true means record with defaults
+    if not isinstance(record_cfg, dict):
+        record_cfg = {}
+    path = record_cfg.get("path", DEFAULT_RECORDING_PATH)
+    if not os.path.isabs(path):
+        path = os.path.join(PROJECT_DIR, path)
+    return {
+        "path": path,
+        "max_transcript_bytes": record_cfg.get("max_transcript_bytes", DEFAULT_MAX_TRANSCRIPT_BYTES),
+    }
+
+
+def append_record(path, record):
+    """Append one JSON line (single write, safe with concurrent hooks)"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    with open(path, 'a') as f:
+        f.write(line)
+
+
+def scrub(value):
+    """Drop literal secrets from a config snapshot ($ENV_VAR references are kept)"""
+    if isinstance(value, dict):
+        clean = {}
+        for key, item in value.items():
+            if key in SECRET_KEYS and isinstance(item, str) and not item.startswith("$"):
+                clean[key] = "***"
+            elif key == "channels" and isinstance(item, list):
+                # Webhook URLs carry tokens; replay only needs type and formatting
+                clean[key] = [
+                    {k: c[k] for k in ("type", "name", "template") if k in c}
+                    for c in item if isinstance(c, dict)
+                ]
+            else:
+                clean[key] = scrub(item)
+        return clean
+    if isinstance(value, list):
+        return [scrub(item) for item in value]
+    return value
+
+
+def snapshot_transcript(transcript_path, max_bytes):
+    """Transcript as of now: all lines, or head + tail if it's too large"""
+    if not transcript_path or not os.path.exists(transcript_path):
+        return None
+    try:
+        size = os.path.getsize(transcript_path)
+        with open(transcript_path, 'r', errors='replace') as f:
+            if size <= max_bytes:
+                return {"size": size, "truncated": False, "lines": f.read().splitlines()}
+            head, tail = [], deque(maxlen=SNAPSHOT_TAIL_LINES)
+            for line in f:
+                (head if len(head) < SNAPSHOT_HEAD_LINES else tail).append(line.rstrip("\n"))
+        return {"size": size, "truncated": True, "lines": head + list(tail)}
+    except IOError as e:
+        log_error(f"Failed to snapshot {transcript_path}", e)
+        return None
+
+
+def record_event(raw_payload, config=None):
+    """Record a hook event. Returns the event id, or None if recording is off."""
+    config = config if config is not None else load_config()
+    settings = record_settings(config)
+    if settings is None:
+        return None
+
+    try:
+        payload = json.loads(raw_payload)
+    except json.JSONDecodeError:
+        payload = {"raw": raw_payload}
+
+    event_id = uuid.uuid4().hex[:12]
+    try:
+        append_record(settings["path"], {
+            "kind": "event",
+            "id": event_id,
+            "ts": time.time(),
+            "payload": payload,
+            "transcript": snapshot_transcript(payload.get("transcript_path"), settings["max_transcript_bytes"]),
+            "config": scrub(config),
+        })
+    except IOError as e:
+        log_error(f"Failed to write {settings['path']}", e)
+        return None
+    return event_id
+
+
+def record_provider(config, script, model, request, response_text, usage, elapsed):
+    """Record an LLM response (None on failure) for the event in GAAP_RECORD_ID"""
+    event_id = os.environ.get("GAAP_RECORD_ID")
+    settings = record_settings(config)
+    if not event_id or settings is None:
+        return
+    try:
+        append_record(settings["path"], {
+            "kind": "provider",
+            "id": event_id,
+            "ts": time.time(),
+            "script": script,
+            "model": model,
+            "request": request,
+            "response": response_text,
+            "usage": {
+                "input_tokens": getattr(usage, "input_tokens", 0) or 0,
+                "output_tokens": getattr(usage, "output_tokens", 0) or 0,
+            },
+            "latency_ms": int(elapsed * 1000),
+        })
+    except IOError as e:
+        log_error(f"Failed to write {settings['path']}", e)
+
+
+def main():
+    """
+    Usage: recorder.py event  (hook payload on stdin)
+    Prints the event id (empty if recording is off).
+    """
+    if len(sys.argv) < 2 or sys.argv[1] != "event":
+        print("Usage: recorder.py event < payload.json", file=sys.stderr)
+        sys.exit(2)
+    event_id = record_event(sys.stdin.read().strip())
+    print(event_id or "")
+
+
+if __name__ == "__main__":
+    main()
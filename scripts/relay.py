@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+GAAP - Notification Relay
+
+Self-hosted aggregator for fleets of GAAP hosts. Hooks send compact events
+(channel type "relay" in gaap.json), the relay batches them per group,
+dedups identical messages across hosts, rate-limits each group and delivers
+grouped digests through the same channels as deliver.py.
+
+Usage: relay.py [--config relay.json] [--bind 127.0.0.1] [--port 8787]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from deliver import DELIVERY_DEADLINE, fan_out, log_error, resolve_value
+
+DEFAULT_CONFIG_PATH = "relay.json"
+DEFAULT_FLUSH_INTERVAL = 10  # seconds between digests
+DEFAULT_RATE_LIMIT = {"messages": 5, "per": 60}  # Feishu allows ~5 msgs/s, 100/min per bot
+DEFAULT_MAX_PENDING = 500  # per group, oldest entries are dropped beyond this
+MAX_EVENT_BYTES = 64 * 1024
+EVENT_FIELDS = ("group", "host", "session", "event", "text")  # all strings when present
+MAX_ORIGINS_SHOWN = 3
+
+
+def load_config(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (IOError, json.JSONDecodeError) as e:
+        log_error(f"Failed to load relay config from {path}", e)
+        return {}
+
+
+class TokenBucket:
+    """Allows `messages` sends per `per` seconds, refilled continuously"""
+
+    def __init__(self, messages, per):
+        self.capacity = max(1, int(messages))
+        self.rate = self.capacity / max(1.0, float(per))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def take(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def refund(self):
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+
+class Group:
+    """Pending events for one user/team, deduplicated by message text"""
+
+    def __init__(self, name, config):
+        self.name = name
+        self.channels = config.get("channels", [])
+        rate = config.get("rate_limit", DEFAULT_RATE_LIMIT)
+        self.bucket = TokenBucket(rate.get("messages", 5), rate.get("per", 60))
+        self.max_pending = config.get("max_pending", DEFAULT_MAX_PENDING)
+        self.pending = OrderedDict()  # dedup key -> entry
+        self.dropped = 0
+
+    def add(self, event):
+        text = event["text"]
+        key = hashlib.md5(f"{event['event']}\n{text}".encode()).hexdigest()
+        entry = self.pending.get(key)
+        if entry is None:
+            if len(self.pending) >= self.max_pending:
+                self.pending.popitem(last=False)
+                self.dropped += 1
+            entry = {"text": text, "origins": OrderedDict(), "count": 0}
+            self.pending[key] = entry
+        origin = f"{event['host']}|{event['session']}"
+        entry["origins"][origin] = entry["origins"].get(origin, 0) + 1
+        entry["count"] += 1
+
+    def take_digest(self, ignore_rate=False):
+        """Pop pending entries as ((host, session, text), taken), or None if empty/rate-limited.
+
+        `taken` goes back through restore() if the digest can't be delivered.
+        """
+        if not self.pending or not (self.bucket.take() or ignore_rate):
+            return None
+        taken = (self.pending, self.dropped)
+        entries = list(self.pending.values())
+        dropped = self.dropped
+        self.pending = OrderedDict()
+        self.dropped = 0
+
+        # A lone event from a single origin goes out exactly like a direct hook message
+        if len(entries) == 1 and len(entries[0]["origins"]) == 1 and not dropped:
+            host, session = next(iter(entries[0]["origins"])).split("|", 1)
+            return (host, session, entries[0]["text"]), taken
+
+        lines = [format_entry(entry) for entry in entries]
+        if dropped:
+            lines.append(f"(+{dropped} 条已丢弃)")
+        return ("GAAP", self.name, "\n".join(lines)), taken
+
+    def restore(self, taken):
+        """Put undelivered entries back ahead of newer ones, merging duplicates"""
+        self.bucket.refund()  # Nothing went out
+        pending, dropped = taken
+        for key, entry in self.pending.items():
+            old = pending.get(key)
+            if old is None:
+                pending[key] = entry
+                continue
+            for origin, count in entry["origins"].items():
+                old["origins"][origin] = old["origins"].get(origin, 0) + count
+            old["count"] += entry["count"]
+        while len(pending) > self.max_pending:
+            pending.popitem(last=False)
+            dropped += 1
+        self.pending = pending
+        self.dropped += dropped
+
+
+def format_entry(entry):
+    origins = list(entry["origins"])
+    shown = ", ".join(origins[:MAX_ORIGINS_SHOWN])
+    if len(origins) > MAX_ORIGINS_SHOWN:
+        shown += f" +{len(origins) - MAX_ORIGINS_SHOWN}"
+    repeat = f" ×{entry['count']}" if entry["count"] > 1 else ""
+    return f"[{shown}]{repeat} {entry['text']}"
+
+
+class Relay:
+    def __init__(self, config):
+        self.flush_interval = float(config.get("flush_interval", DEFAULT_FLUSH_INTERVAL))
+        self.token = resolve_value(config.get("token"))
+        groups = config.get("groups", {})
+        if "default" not in groups:
+            groups["default"] = {"channels": config.get("channels", [])}
+        self.groups = {name: Group(name, cfg) for name, cfg in groups.items()}
+        self.lock = threading.Lock()
+        self.stats = {"received": 0, "digests": 0, "failed": 0}
+        self.stop_event = threading.Event()
+
+    def submit(self, event):
+        """Queue one event (string fields checked by the handler, see EVENT_FIELDS)"""
+        group = self.groups.get(event.get("group")) or self.groups["default"]
+        with self.lock:
+            group.add({
+                "host": event.get("host") or "?",
+                "session": event.get("session") or "?",
+                "event": event.get("event") or "",
+                "text": event["text"],
+            })
+            self.stats["received"] += 1
+
+    def flush(self, final=False):
+        """Send one digest per group that has pending events and rate budget left.
+
+        Digests that no channel accepted are queued again. The final flush on
+        shutdown ignores the rate limit so nothing is left behind.
+        """
+        with self.lock:
+            digests = []
+            for group in self.groups.values():
+                digest = group.take_digest(ignore_rate=final)
+                if digest:
+                    digests.append((group, digest))
+
+        for group, ((host, session, text), taken) in digests:
+            if not group.channels:
+                log_error(f"relay group {group.name} has no channels, digest dropped")
+                continue
+            report = asyncio.run(fan_out(group.channels, host, session, "digest", text))
+            failed = sum(1 for _, ok, _ in report if not ok)
+            self.stats["failed"] += failed
+            if failed < len(report):
+                self.stats["digests"] += 1
+            elif final:
+                log_error(f"relay group {group.name}: all channels failed on shutdown, "
+                          f"{len(taken[0])} pending messages lost")
+            else:
+                with self.lock:
+                    group.restore(taken)
+
+    def run_flusher(self):
+        while not self.stop_event.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                log_error("relay flush failed", e)
+
+    def snapshot(self):
+        with self.lock:
+            pending = {name: len(group.pending) for name, group in self.groups.items()}
+        return {**self.stats, "pending": pending}
+
+
+def make_handler(relay):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._reply(200, relay.snapshot())
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/event":
+                return self._reply(404, {"error": "not found"})
+            if relay.token and self.headers.get("X-GAAP-Token") != relay.token:
+                return self._reply(401, {"error": "bad token"})
+            length = int(self.headers.get("Content-Length") or 0)
+            if not 0 < length <= MAX_EVENT_BYTES:
+                return self._reply(413, {"error": "bad length"})
+            try:
+                event = json.loads(self.rfile.read(length))
+            except (ValueError, UnicodeDecodeError):
+                return self._reply(400, {"error": "bad json"})
+            if not isinstance(event, dict):
+                return self._reply(400, {"error": "bad event"})
+            for field in EVENT_FIELDS:
+                if event.get(field) is not None and not isinstance(event[field], str):
+                    return self._reply(400, {"error": f"{field} must be a string"})
+            if not event.get("text"):
+                return self._reply(400, {"error": "missing text"})
+            relay.submit(event)
+            self._reply(202, {"queued": True})
+
+        def log_message(self, format, *args):
+            pass  # Keep stdout quiet, errors go to .gaap_error.log
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GAAP notification relay")
+    parser.add_argument("--config", default=DEFAULT_CONFIG_PATH, help="relay config (JSON)")
+    parser.add_argument("--bind", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8787)
+    args = parser.parse_args()
+
+    relay = Relay(load_config(args.config))
+    server = ThreadingHTTPServer((args.bind, args.port), make_handler(relay))
+    flusher = threading.Thread(target=relay.run_flusher, daemon=True)
+    flusher.start()
+    # systemd / docker stop with SIGTERM: stop serving, then flush (shutdown() must not run on the serving thread)
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+
+    print(f"GAAP relay listening on {args.bind}:{args.port} "
+          f"(groups: {', '.join(relay.groups)}, flush every {relay.flush_interval:g}s)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        relay.stop_event.set()
+        server.server_close()
+        flusher.join(timeout=DELIVERY_DEADLINE)
+        relay.flush(final=True)  # Don't lose what's pending on shutdown
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+GAAP - Hook Event Replay
+
+Feeds a recording made by recorder.py back through the hook scripts at the
+original (or accelerated) timing, against local stub LLM and webhook
+endpoints, and reports hook latency and the messages that were delivered.
+Reports from two GAAP versions can be compared to catch slowdowns and
+output changes before rollout.
+
+Usage: replay.py run <recording.jsonl> [--speed 10] [--scripts DIR] [--report out.json]
+       replay.py compare <baseline.json> <candidate.json> [--max-regression 0.2]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Hook script per hook_event_name (anything else goes through notify.sh)
+HOOK_SCRIPTS = {
+    "PermissionRequest": "permission_notify.sh",
+}
+HOOK_TIMEOUT = 30  # seconds, generous: a replay should measure, not kill
+# Config keys that would make a replay slow, stateful or leave the sandbox
+REPLAY_DROP_KEYS = ("defer", "governor", "record", "runtime_path", "python_flags", "python_flags_lean")
+
+
+def load_recording(path):
+    """Return (events sorted by time, provider records grouped by event id)"""
+    events, providers = [], defaultdict(list)
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Partially written line at the end of a live recording
+            if record.get("kind") == "event":
+                events.append(record)
+            elif record.get("kind") == "provider":
+                providers[record["id"]].append(record)
+    events.sort(key=lambda r: r["ts"])
+    return events, providers
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class StubServers:
+    """Local stand-ins for the Anthropic Messages API and the notification webhook"""
+
+    def __init__(self, providers, llm_latency=True):
+        # Recorded responses keyed by request content, served in recorded order
+        self.responses = defaultdict(list)
+        for records in providers.values():
+            for r in records:
+                self.responses[r["request"]].append(r)
+        self.llm_latency = llm_latency
+        self.messages = []
+        self.llm_calls = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def llm_response(self, request):
+        content = request.get("messages", [{}])[0].get("content", "")
+        with self.lock:
+            self.llm_calls += 1
+            queue = self.responses.get(content)
+            record = (queue.pop(0) if len(queue) > 1 else queue[0]) if queue else None
+        if record is None:
+            # Unrecorded request (e.g. the GAAP version under test changed the prompt)
+            return 200, {"text": content[:50], "input_tokens": 0, "output_tokens": 0}, 0
+        if record["response"] is None:
+            return 500, None, record["latency_ms"]
+        return 200, {"text": record["response"], **record["usage"]}, record["latency_ms"]
+
+    def _handler(self):
+        stubs = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+
+                if self.path.endswith("/v1/messages"):
+                    status, result, latency_ms = stubs.llm_response(body)
+                    if stubs.llm_latency and latency_ms:
+                        time.sleep(latency_ms / 1000)
+                    if result is None:
+                        return self._reply(status, {"type": "error", "error": {"type": "api_error", "message": "recorded failure"}})
+                    return self._reply(status, {
+                        "id": "msg_replay",
+                        "type": "message",
+                        "role": "assistant",
+                        "model": body.get("model", ""),
+                        "content": [{"type": "text", "text": result["text"]}],
+                        "stop_reason": "end_turn",
+                        "stop_sequence": None,
+                        "usage": {"input_tokens": result["input_tokens"], "output_tokens": result["output_tokens"]},
+                    })
+
+                # Webhook: keep the rendered text (Feishu payload) per channel
+                text = body.get("content", {}).get("text") or body.get("message") or json.dumps(body)
+                with stubs.lock:
+                    stubs.messages.append({"channel": self.path.strip("/"), "text": text})
+                self._reply(200, {"code": 0})
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def prepare_project(workdir, event, stub_url):
+    """Materialise the recorded project (config + transcript) and rewrite the payload"""
+    payload = dict(event["payload"])
+    cwd = payload.get("cwd") or "project"
+    project = os.path.join(workdir, hashlib.md5(cwd.encode()).hexdigest()[:8], os.path.basename(cwd.rstrip("/")))
+    os.makedirs(os.path.join(project, ".claude"), exist_ok=True)
+
+    config = {k: v for k, v in (event.get("config") or {}).items() if k not in REPLAY_DROP_KEYS}
+    recorded_channels = config.get("channels") or [{"type": "feishu"}]
+    config["channels"] = [
+        {**c, "type": "feishu", "url": f"{stub_url}/{c.get('name') or c.get('type', 'feishu')}{i}", "retries": 1}
+        for i, c in enumerate(recorded_channels)
+    ]
+    if "compress" in config:
+        config["compress"] = {**config["compress"], "base_url": stub_url, "api_key": "replay"}
+        config["compress"].pop("candidates", None)
+    config["python_path"] = sys.executable
+    with open(os.path.join(project, ".claude/gaap.json"), 'w') as f:
+        json.dump(config, f, indent=2, ensure_ascii=False)
+
+    transcript = event.get("transcript")
+    if transcript is not None:
+        # One file per event (same name, so the session id is unchanged)
+        name = os.path.basename(payload.get("transcript_path") or "session.jsonl")
+        path = os.path.join(project, "transcripts", event["id"], name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write("\n".join(transcript["lines"]) + "\n")
+        payload["transcript_path"] = path
+    payload["cwd"] = project
+    return payload
+
+
+def run_hook(scripts_dir, payload):
+    """Run one hook script, return wall time in ms"""
+    script = HOOK_SCRIPTS.get(payload.get("hook_event_name"), "notify.sh")
+    env = {k: v for k, v in os.environ.items()
+           if k not in ("FEISHU_WEBHOOK_URL", "GAAP_API_KEY", "GAAP_RECORD_ID")}
+    start = time.perf_counter()
+    try:
+        subprocess.run(
+            ["bash", os.path.join(scripts_dir, script)],
+            # Compact separators, exactly like Claude Code (the hook scripts grep for "key":"value")
+            input=json.dumps(payload, ensure_ascii=False, separators=(",", ":")) + "\n",
+            text=True, env=env, timeout=HOOK_TIMEOUT,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+    except subprocess.TimeoutExpired:
+        pass
+    return (time.perf_counter() - start) * 1000
+
+
+def replay(recording, scripts_dir=SCRIPTS_DIR, speed=1.0, llm_latency=True):
+    events, providers = load_recording(recording)
+    if not events:
+        raise SystemExit(f"No events in {recording}")
+
+    results = [None] * len(events)
+    # Same path on every run of this recording: fallback titles hash the project
+    # path, so outputs of two GAAP versions stay comparable
+    digest = hashlib.md5(os.path.abspath(recording).encode()).hexdigest()[:8]
+    workdir = os.path.join(tempfile.gettempdir(), f"gaap_replay_{digest}")
+    shutil.rmtree(workdir, ignore_errors=True)
+    try:
+        with StubServers(providers, llm_latency) as stubs:
+            payloads = [prepare_project(workdir, e, stubs.url) for e in events]
+
+            def worker(index):
+                latency = run_hook(scripts_dir, payloads[index])
+                results[index] = {
+                    "id": events[index]["id"],
+                    "event": payloads[index].get("hook_event_name", ""),
+                    "latency_ms": round(latency, 1),
+                }
+
+            # Start each hook at its recorded offset so bursts overlap like in production
+            threads = []
+            t0, start = events[0]["ts"], time.monotonic()
+            for index, event in enumerate(events):
+                delay = (event["ts"] - t0) / speed - (time.monotonic() - start)
+                if delay > 0:
+                    time.sleep(delay)
+                thread = threading.Thread(target=worker, args=(index,))
+                thread.start()
+                threads.append(thread)
+            for thread in threads:
+                thread.join()
+
+            messages = sorted(stubs.messages, key=lambda m: (m["channel"], m["text"]))
+            llm_calls = stubs.llm_calls
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    latencies = [r["latency_ms"] for r in results]
+    return {
+        "recording": os.path.abspath(recording),
+        "scripts": os.path.abspath(scripts_dir),
+        "speed": speed,
+        "events": len(events),
+        "llm_calls": llm_calls,
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "max": max(latencies),
+            "mean": round(statistics.mean(latencies), 1),
+        },
+        "per_event": results,
+        "messages": messages,
+    }
+
+
+def print_summary(report):
+    lat = report["latency_ms"]
+    print(f"Replayed {report['events']} events from {report['recording']}")
+    print(f"  scripts:  {report['scripts']} (speed x{report['speed']:g})")
+    print(f"  latency:  p50 {lat['p50']:.0f} ms, p90 {lat['p90']:.0f} ms, max {lat['max']:.0f} ms")
+    print(f"  LLM calls: {report['llm_calls']}, messages delivered: {len(report['messages'])}")
+
+
+def compare(baseline, candidate, max_regression):
+    """Print latency and output differences. Returns False on a p90 regression."""
+    ok = True
+    print(f"{'':<6} {'baseline':>10} {'candidate':>10} {'change':>8}")
+    for key in ("p50", "p90", "max", "mean"):
+        before, after = baseline["latency_ms"][key], candidate["latency_ms"][key]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if key == "p90" and change > max_regression:
+            flag, ok = "  ✗ regression", False
+        print(f"{key:<6} {before:>8.0f}ms {after:>8.0f}ms {change:>+7.0%}{flag}")
+
+    before = Counter(m["text"] for m in baseline["messages"])
+    after = Counter(m["text"] for m in candidate["messages"])
+    missing, extra = before - after, after - before
+    print(f"\nmessages: {sum(before.values())} -> {sum(after.values())}, LLM calls: "
+          f"{baseline['llm_calls']} -> {candidate['llm_calls']}")
+    for text, count in missing.items():
+        print(f"  - {text}" + (f" (x{count})" if count > 1 else ""))
+    for text, count in extra.items():
+        print(f"  + {text}" + (f" (x{count})" if count > 1 else ""))
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded GAAP hook events")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_p = sub.add_parser("run", help="replay a recording")
+    run_p.add_argument("recording")
+    run_p.add_argument("--speed", type=float, default=1.0, help="time acceleration (10 = 10x faster)")
+    run_p.add_argument("--scripts", default=SCRIPTS_DIR, help="GAAP scripts dir to test (default: this one)")
+    run_p.add_argument("--no-llm-latency", action="store_true", help="answer LLM calls instantly")
+    run_p.add_argument("--report", help="write the JSON report here")
+
+    cmp_p = sub.add_parser("compare", help="compare two replay reports")
+    cmp_p.add_argument("baseline")
+    cmp_p.add_argument("candidate")
+    cmp_p.add_argument("--max-regression", type=float, default=0.2, help="allowed p90 slowdown (0.2 = 20%%)")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        report = replay(args.recording, args.scripts, args.speed, not args.no_llm_latency)
+        print_summary(report)
+        if args.report:
+            with open(args.report, 'w') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.candidate) as f:
+            candidate = json.load(f)
+        sys.exit(0 if compare(baseline, candidate, args.max_regression) else 1)
+
+
+if __name__ == "__main__":
+    main()
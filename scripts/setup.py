@@ -91,7 +91,7 @@ def save_env(env):
 
 
 def setup_webhook():
-    print_step(1, 3, "配置飞书 Webhook")
+    print_step(1, 4, "配置飞书 Webhook")
 
     print(f"""
 {YELLOW}如何获取 Webhook URL:{RESET}
@@ -129,7 +129,7 @@ def load_config():
 
 
 def setup_llm_mode():
-    print_step(2, 3, "配置 LLM 模式")
+    print_step(2, 4, "配置 LLM 模式")
 
     existing = load_config()
     current_mode = existing.get("llm_mode", "none")
@@ -228,8 +228,35 @@ def save_config(config):
         json.dump(config, f, indent=2, ensure_ascii=False)
 
 
+def setup_probe():
+    """Probe the webhook and candidate endpoints from this host, keep the fastest"""
+    print_step(3, 4, "端点测速")
+
+    print(f"""
+{YELLOW}从本机探测飞书 Webhook 和 LLM 端点的连接 / TLS / 首 token 延迟，
+并自动选用最快的健康端点。不同代理环境下最快的服务商可能不同。{RESET}
+""")
+
+    if get_input("开始测速? (y/n)", "y").lower() != "y":
+        return
+
+    extra = []
+    if load_config().get("llm_mode", "none") != "none":
+        print(f"\n可添加其他候选端点 (使用相同 API Key)，{CYAN}Base URL 留空结束{RESET}")
+        while True:
+            base_url = get_input("候选 Base URL")
+            if not base_url:
+                break
+            model = get_input("Model", "claude-3-haiku-20240307")
+            extra.append((base_url, model))
+
+    print()
+    from doctor import run_doctor
+    run_doctor(extra=extra, write=True)
+
+
 def show_summary():
-    print_step(3, 3, "配置完成!")
+    print_step(4, 4, "配置完成!")
 
     # Load and display current config
     config = load_config()
@@ -258,6 +285,9 @@ def show_summary():
 
 {BOLD}修改配置:{RESET}
   再次运行 /gaap:setup 或直接编辑配置文件。
+
+{BOLD}重新测速:{RESET}
+  运行 /gaap:doctor
 """)
 
 
@@ -271,6 +301,9 @@ def main():
     print()
     setup_llm_mode()
 
+    print()
+    setup_probe()
+
     print()
     show_summary()
 
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+GAAP - Transcript Decoder
+
+Selective decoding of Claude Code transcripts (.jsonl). Lines are pre-screened
+with byte-level checks before any JSON parsing, and only the fields GAAP uses
+are decoded (type, cwd, sessionId, permissionMode and message role / content /
+stop_reason; tool inputs and tool_result bodies are skipped).
+
+Backends, fastest available first: msgspec (typed schema, unknown fields are
+never materialized), orjson, json. Set GAAP_JSON_BACKEND to force one.
+Malformed lines are skipped and counted instead of aborting the scan.
+
+Supports both transcript formats, detected once per file:
+- Old: {"type":"user","message":{"content":"..."}}
+- New: {"message":{"role":"user","content":[{"type":"text","text":"..."}]}}
+"""
+
+import json
+import os
+import sys
+from typing import List, NamedTuple, Optional, Union
+
+# Byte-level pre-screens. A quote inside a JSON string is always escaped, so
+# these sequences only ever match structure, never message text.
+MESSAGE_MARKER = b'"message"'
+USER_MARKER = b'"user"'
+TOOL_RESULT_MARKER = b'"type":"tool_result"'
+
+
+class Block(NamedTuple):
+    type: str = ""
+    text: Optional[str] = None
+    id: Optional[str] = None
+    name: Optional[str] = None
+    tool_use_id: Optional[str] = None
+
+
+class Message(NamedTuple):
+    role: Optional[str] = None
+    content: Union[str, List[Block], None] = None
+    stop_reason: Optional[str] = None
+
+
+class Entry(NamedTuple):
+    type: Optional[str] = None
+    cwd: Optional[str] = None
+    session_id: Optional[str] = None
+    permission_mode: Optional[str] = None
+    message: Optional[Message] = None
+
+
+def _str(value):
+    return value if isinstance(value, str) else None
+
+
+def _from_dict(data):
+    """Build an Entry from a fully decoded line (orjson / json backends)"""
+    if not isinstance(data, dict):
+        return None
+    message = None
+    msg = data.get("message")
+    if isinstance(msg, dict):
+        content = msg.get("content")
+        if isinstance(content, list):
+            content = [
+                Block(_str(b.get("type")) or "", _str(b.get("text")), _str(b.get("id")),
+                      _str(b.get("name")), _str(b.get("tool_use_id")))
+                for b in content if isinstance(b, dict)
+            ]
+        elif not isinstance(content, str):
+            content = None
+        message = Message(_str(msg.get("role")), content, _str(msg.get("stop_reason")))
+    return Entry(_str(data.get("type")), _str(data.get("cwd")), _str(data.get("sessionId")),
+                 _str(data.get("permissionMode")), message)
+
+
+def _select_backend():
+    """(name, decode) for the fastest available backend. decode() raises ValueError on bad input."""
+    forced = os.environ.get("GAAP_JSON_BACKEND", "")
+
+    if forced in ("", "msgspec"):
+        try:
+            import msgspec
+
+            # Same attribute names as the NamedTuples above
+            class _Block(msgspec.Struct):
+                type: str = ""
+                text: Optional[str] = None
+                id: Optional[str] = None
+                name: Optional[str] = None
+                tool_use_id: Optional[str] = None
+
+            class _Message(msgspec.Struct):
+                role: Optional[str] = None
+                content: Union[str, List[_Block], None] = None
+                stop_reason: Optional[str] = None
+
+            class _Entry(msgspec.Struct):
+                type: Optional[str] = None
+                cwd: Optional[str] = None
+                session_id: Optional[str] = msgspec.field(default=None, name="sessionId")
+                permission_mode: Optional[str] = msgspec.field(default=None, name="permissionMode")
+                message: Optional[_Message] = None
+
+            typed = msgspec.json.Decoder(_Entry)
+            untyped = msgspec.json.Decoder()
+
+            def decode_msgspec(line):
+                try:
+                    return typed.decode(line)
+                except msgspec.ValidationError:
+                    # Valid JSON with unexpected field types: decode leniently
+                    return _from_dict(untyped.decode(line))
+                except msgspec.DecodeError as e:
+                    raise ValueError(str(e))
+
+            return "msgspec", decode_msgspec
+        except ImportError:
+            pass
+
+    if forced in ("", "msgspec", "orjson"):
+        try:
+            import orjson
+            return "orjson", lambda line: _from_dict(orjson.loads(line))
+        except ImportError:
+            pass
+
+    return "json", lambda line: _from_dict(json.loads(line))
+
+
+BACKEND, _decode = _select_backend()
+
+
+def decode(line):
+    """Decode one transcript line (bytes or str). Returns an Entry, or None if malformed."""
+    try:
+        return _decode(line)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def texts(entry):
+    """Text parts of an entry's message content"""
+    content = entry.message.content if entry.message else None
+    if isinstance(content, str):
+        return [content]
+    return [b.text for b in content or () if b.type == "text" and b.text]
+
+
+class Transcript:
+    """One transcript file: detects its format on the first message line"""
+
+    def __init__(self, path):
+        self.path = path
+        self.format = None  # "new" (message.role) or "old" (top-level type)
+        self.decoded = 0
+        self.skipped = 0
+
+    def decode(self, line):
+        entry = decode(line)
+        if entry is None:
+            self.skipped += 1
+            return None
+        self.decoded += 1
+        if self.format is None and entry.message is not None:
+            self.format = "new" if entry.message.role else "old"
+        return entry
+
+    def role(self, entry):
+        if entry.message is None:
+            return None
+        if self.format == "new":
+            return entry.message.role
+        return entry.type
+
+    def entries(self, require=MESSAGE_MARKER, exclude=None):
+        """Decoded entries of lines containing `require` and not `exclude`"""
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if require not in line or (exclude and exclude in line):
+                    continue
+                entry = self.decode(line)
+                if entry is not None:
+                    yield entry
+
+    def user_texts(self):
+        """Text of user prompts, in order (tool results are never decoded)"""
+        for entry in self.entries(USER_MARKER, TOOL_RESULT_MARKER):
+            if self.role(entry) == "user":
+                yield from texts(entry)
+
+
+def main():
+    """
+    Usage: transcript.py <transcript_path>
+    Prints backend, detected format and decode statistics.
+    """
+    if len(sys.argv) < 2:
+        print("Usage: transcript.py <transcript_path>", file=sys.stderr)
+        sys.exit(2)
+    transcript = Transcript(sys.argv[1])
+    roles = {}
+    for entry in transcript.entries():
+        role = transcript.role(entry) or "?"
+        roles[role] = roles.get(role, 0) + 1
+    print(f"backend: {BACKEND}")
+    print(f"format:  {transcript.format or 'unknown'}")
+    print(f"decoded: {transcript.decoded} lines ({', '.join(f'{k} {v}' for k, v in sorted(roles.items()))})")
+    print(f"skipped: {transcript.skipped} malformed lines")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+GAAP - Transcript Watcher
+
+Alternative to hooks: one daemon tails every session transcript under
+~/.claude/projects/*/<session>.jsonl (inotify on Linux, polling elsewhere),
+parses only the newly appended lines and detects the states GAAP notifies on:
+
+  - AskUserQuestion tool call            -> question_notify.sh
+  - tool call without a result after
+    --permission-grace seconds (opt-in)  -> permission_notify.sh (PermissionRequest)
+  - assistant reply ending the turn
+    (stop_reason "end_turn", or any text
+    reply in transcripts without
+    stop_reason), followed by
+    --stop-grace seconds of silence      -> notify.sh (Stop)
+
+The hook scripts are run with a synthesized hook payload, so titles, rule
+detection, LLM compression, defer and delivery behave exactly as with hooks.
+User prompts and tool results cancel deferred notifications, like
+cancel_pending.sh does for UserPromptSubmit / PostToolUse.
+Don't run it for projects that also have GAAP hooks installed, or you will
+get each notification twice.
+
+Usage: watcher.py [--projects-dir ~/.claude/projects] [--stop-grace 5]
+                  [--permission-grace 0] [--poll] [--interval 1]
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import glob
+import json
+import os
+import select
+import struct
+import subprocess
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+import transcript
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PROJECTS_DIR = os.path.expanduser("~/.claude/projects")
+DEFAULT_STOP_GRACE = 5         # seconds of silence after a final reply
+DEFAULT_PERMISSION_GRACE = 0   # seconds a tool call may wait for its result (0 = off)
+DEFAULT_INTERVAL = 1.0         # polling interval / max sleep between timer checks
+DEFAULT_MAX_PROCS = 16         # hook scripts running at once
+READ_CHUNK = 1024 * 1024
+
+# Tools that never ask for permission (or run long for other reasons)
+NO_PERMISSION_TOOLS = {
+    "AskUserQuestion", "Task", "TodoWrite", "Read", "Glob", "Grep", "LS",
+    "NotebookRead", "ExitPlanMode", "BashOutput", "KillShell",
+}
+AUTO_APPROVE_MODES = {"bypassPermissions", "dontAsk"}
+EDIT_TOOLS = {"Edit", "MultiEdit", "Write", "NotebookEdit"}  # auto-approved under acceptEdits
+
+# inotify(7)
+IN_MODIFY = 0x00000002
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def log(message):
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {message}", file=sys.stderr, flush=True)
+
+
+class Session:
+    """Incremental parse state of one transcript file"""
+
+    def __init__(self, path, offset=0):
+        self.path = path
+        self.session_id = Path(path).stem
+        self.offset = offset
+        self.partial = b""
+        self.transcript = transcript.Transcript(path)
+        self.cwd = ""
+        self.permission_mode = "default"
+        self.pending_tools = {}     # tool_use_id -> [name, seen_at, notified]
+        self.reply_at = None        # when a turn-ending reply was seen (None once notified)
+        self.has_stop_reason = False  # transcript populates message.stop_reason
+
+    def read_new_lines(self):
+        """Complete lines appended since the last read"""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return []
+        if size < self.offset:
+            # Truncated or replaced: start over
+            self.offset, self.partial = 0, b""
+        if size == self.offset:
+            return []
+
+        lines = []
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            while True:
+                chunk = f.read(READ_CHUNK)
+                if not chunk:
+                    break
+                self.offset += len(chunk)
+                *complete, self.partial = (self.partial + chunk).split(b"\n")
+                lines.extend(line for line in complete if line.strip())
+        return lines
+
+    def feed(self, line, now):
+        """Update state from one transcript line. Returns a question tool name or None."""
+        if transcript.MESSAGE_MARKER not in line:
+            return None
+        entry = self.transcript.decode(line)
+        if entry is None:
+            return None  # Malformed line, keep going
+
+        self.cwd = entry.cwd or self.cwd
+        self.session_id = entry.session_id or self.session_id
+        self.permission_mode = entry.permission_mode or self.permission_mode
+        if entry.message is None:
+            return None
+
+        role = self.transcript.role(entry)
+        content = entry.message.content
+        blocks = content if isinstance(content, list) else []
+
+        if role == "user":
+            # Tool results close pending calls; a new prompt means the user is back
+            # (and that any call still pending was interrupted)
+            results = [b for b in blocks if b.type == "tool_result"]
+            for block in results:
+                self.pending_tools.pop(block.tool_use_id, None)
+            if not results:
+                self.pending_tools.clear()
+            self.reply_at = None
+            self.cancel_pending("PostToolUse" if results else "UserPromptSubmit")
+            return None
+
+        if role != "assistant":
+            return None
+
+        question = None
+        tool_uses = [b for b in blocks if b.type == "tool_use"]
+        for block in tool_uses:
+            self.pending_tools[block.id] = [block.name or "?", now, False]
+            if block.name == "AskUserQuestion":
+                question = block.name
+        stop_reason = entry.message.stop_reason
+        if stop_reason:
+            self.has_stop_reason = True
+        if tool_uses or (stop_reason and stop_reason != "end_turn"):
+            self.reply_at = None
+        elif stop_reason == "end_turn":
+            self.reply_at = now
+        elif not self.has_stop_reason and transcript.texts(entry):
+            # Transcript without stop_reason: any text reply may end the turn
+            self.reply_at = now
+        return question
+
+    def cancel_pending(self, event):
+        """Drop a notification the hook scripts are holding for `defer` (as cancel_pending.sh does)"""
+        if not self.cwd:
+            return
+        marker = os.path.join(self.cwd, ".claude", ".gaap_pending", self.session_id)
+        try:
+            os.remove(marker)
+        except OSError:
+            return  # Nothing pending
+        try:
+            with open(os.path.join(self.cwd, ".claude", ".gaap_trace.log"), "a") as f:
+                f.write(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] DEFER: {event} cancels pending notification "
+                        f"(session {self.session_id}, watcher)\n")
+        except OSError:
+            pass
+
+    def may_ask_permission(self, name):
+        if name in NO_PERMISSION_TOOLS or self.permission_mode in AUTO_APPROVE_MODES:
+            return False
+        return not (self.permission_mode == "acceptEdits" and name in EDIT_TOOLS)
+
+    def due(self, now, stop_grace, permission_grace):
+        """Events whose grace period has passed: [(hook_event_name, tool_name)]"""
+        events = []
+        if self.reply_at is not None and not self.pending_tools and now - self.reply_at >= stop_grace:
+            self.reply_at = None
+            events.append(("Stop", None))
+        if permission_grace:
+            for state in self.pending_tools.values():
+                name, seen_at, notified = state
+                if not notified and self.may_ask_permission(name) and now - seen_at >= permission_grace:
+                    state[2] = True
+                    events.append(("PermissionRequest", name))
+        return events
+
+    def next_deadline(self, stop_grace, permission_grace):
+        deadlines = []
+        if self.reply_at is not None:
+            deadlines.append(self.reply_at + stop_grace)
+        if permission_grace:
+            deadlines.extend(seen_at + permission_grace
+                             for name, seen_at, notified in self.pending_tools.values()
+                             if not notified and self.may_ask_permission(name))
+        return min(deadlines) if deadlines else None
+
+
+class HookRunner:
+    """Runs the hook scripts with a synthesized payload, at most max_procs at once"""
+
+    SCRIPTS = {
+        "Stop": "notify.sh",
+        "PermissionRequest": "permission_notify.sh",
+        "PreToolUse": "question_notify.sh",
+    }
+
+    def __init__(self, scripts_dir, max_procs):
+        self.scripts_dir = scripts_dir
+        self.max_procs = max_procs
+        self.queue = deque()
+        self.running = []
+
+    def submit(self, session, event, tool_name=None):
+        if not session.cwd:
+            log(f"{session.session_id}: no cwd in transcript yet, skipping {event}")
+            return
+        payload = {
+            "session_id": session.session_id,
+            "transcript_path": session.path,
+            "cwd": session.cwd,
+            "permission_mode": session.permission_mode,
+            "hook_event_name": event,
+        }
+        if tool_name:
+            payload["tool_name"] = tool_name
+        # Compact, single line: the hook scripts parse it with grep
+        line = json.dumps(payload, ensure_ascii=False, separators=(",", ":")) + "\n"
+        log(f"{session.session_id}: {event}{f' ({tool_name})' if tool_name else ''} in {session.cwd}")
+        self.queue.append((os.path.join(self.scripts_dir, self.SCRIPTS[event]), line))
+        self.pump()
+
+    def pump(self):
+        self.running = [p for p in self.running if p.poll() is None]
+        while self.queue and len(self.running) < self.max_procs:
+            script, line = self.queue.popleft()
+            try:
+                proc = subprocess.Popen([script], stdin=subprocess.PIPE,
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                proc.stdin.write(line.encode())
+                proc.stdin.close()
+                self.running.append(proc)
+            except OSError as e:
+                log(f"Failed to run {script}: {e}")
+
+
+class Inotify:
+    """Minimal inotify binding (ctypes). Raises OSError where unsupported."""
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self.libc, "inotify_init1"):
+            raise OSError("inotify not available")
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.paths = {}  # wd -> directory
+
+    def add_watch(self, path, mask):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        self.paths[wd] = path
+        return wd
+
+    def read_events(self):
+        """[(directory, mask, name)] of all queued events"""
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            pos = 0
+            while pos + EVENT_HEADER.size <= len(data):
+                wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, pos)
+                pos += EVENT_HEADER.size
+                name = os.fsdecode(data[pos:pos + length].rstrip(b"\0"))
+                pos += length
+                events.append((self.paths.get(wd), mask, name))
+
+
+class Watcher:
+    def __init__(self, projects_dir, runner, stop_grace, permission_grace):
+        self.projects_dir = projects_dir
+        self.runner = runner
+        self.stop_grace = stop_grace
+        self.permission_grace = permission_grace
+        self.sessions = {}  # transcript path -> Session
+
+    def track(self, path, from_start):
+        """Start following a transcript. Existing history is skipped on startup."""
+        if path in self.sessions or not path.endswith(".jsonl"):
+            return
+        offset = 0
+        if not from_start:
+            try:
+                offset = os.path.getsize(path)
+            except OSError:
+                return
+        self.sessions[path] = Session(path, offset)
+
+    def scan(self, from_start):
+        for path in glob.glob(os.path.join(self.projects_dir, "*", "*.jsonl")):
+            self.track(path, from_start)
+
+    def process(self, path):
+        session = self.sessions.get(path)
+        if session is None:
+            return
+        now = time.monotonic()
+        for line in session.read_new_lines():
+            question = session.feed(line, now)
+            if question:
+                self.runner.submit(session, "PreToolUse", question)
+
+    def check_timers(self):
+        now = time.monotonic()
+        for session in self.sessions.values():
+            for event, tool_name in session.due(now, self.stop_grace, self.permission_grace):
+                self.runner.submit(session, event, tool_name)
+        self.runner.pump()
+
+    def timeout(self, interval):
+        """Sleep until the nearest grace deadline (at most `interval`)"""
+        deadlines = [d for d in (s.next_deadline(self.stop_grace, self.permission_grace)
+                                 for s in self.sessions.values()) if d is not None]
+        if not deadlines:
+            return interval
+        return min(interval, max(0.0, min(deadlines) - time.monotonic()))
+
+    def run_inotify(self, interval):
+        inotify = Inotify()
+        file_mask = IN_MODIFY | IN_CREATE | IN_MOVED_TO | IN_DELETE
+        inotify.add_watch(self.projects_dir, IN_CREATE | IN_MOVED_TO)
+        # One watch per project directory, not per transcript
+        for project in glob.glob(os.path.join(self.projects_dir, "*", "")):
+            inotify.add_watch(project.rstrip(os.sep), file_mask)
+        self.scan(from_start=False)
+        log(f"Watching {len(inotify.paths) - 1} projects, {len(self.sessions)} transcripts (inotify)")
+
+        while True:
+            ready, _, _ = select.select([inotify.fd], [], [], self.timeout(interval))
+            if ready:
+                changed = set()
+                for directory, mask, name in inotify.read_events():
+                    if mask & IN_Q_OVERFLOW:
+                        # Events were dropped: re-read everything we follow
+                        changed.update(self.sessions)
+                        continue
+                    if directory is None or not name:
+                        continue
+                    path = os.path.join(directory, name)
+                    if directory == self.projects_dir:
+                        if mask & IN_ISDIR:
+                            inotify.add_watch(path, file_mask)
+                            for jsonl in glob.glob(os.path.join(path, "*.jsonl")):
+                                self.track(jsonl, from_start=True)
+                                changed.add(jsonl)
+                    elif mask & IN_DELETE:
+                        self.sessions.pop(path, None)
+                    elif not mask & IN_ISDIR:
+                        self.track(path, from_start=True)
+                        changed.add(path)
+                for path in changed:
+                    self.process(path)
+            self.check_timers()
+
+    def run_polling(self, interval):
+        self.scan(from_start=False)
+        log(f"Watching {len(self.sessions)} transcripts (polling every {interval:g}s)")
+        while True:
+            self.scan(from_start=True)
+            for path in list(self.sessions):
+                if not os.path.exists(path):
+                    del self.sessions[path]
+                    continue
+                self.process(path)
+            self.check_timers()
+            time.sleep(self.timeout(interval))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GAAP transcript watcher (alternative to hooks)")
+    parser.add_argument("--projects-dir", default=DEFAULT_PROJECTS_DIR, help="Claude Code projects directory")
+    parser.add_argument("--scripts", default=SCRIPT_DIR, help="directory with the GAAP hook scripts")
+    parser.add_argument("--stop-grace", type=float, default=DEFAULT_STOP_GRACE,
+                        help="seconds of silence after a final reply before notifying")
+    parser.add_argument("--permission-grace", type=float, default=DEFAULT_PERMISSION_GRACE,
+                        help="seconds a tool call may wait for its result before it counts as a permission "
+                             "prompt (default 0 = off; long-running commands look the same)")
+    parser.add_argument("--max-procs", type=int, default=DEFAULT_MAX_PROCS, help="hook scripts running at once")
+    parser.add_argument("--poll", action="store_true", help="poll instead of using inotify")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, help="polling interval (seconds)")
+    args = parser.parse_args()
+
+    projects_dir = os.path.abspath(os.path.expanduser(args.projects_dir))
+    if not os.path.isdir(projects_dir):
+        print(f"Not a directory: {projects_dir}", file=sys.stderr)
+        sys.exit(1)
+
+    runner = HookRunner(os.path.abspath(args.scripts), max(1, args.max_procs))
+    watcher = Watcher(projects_dir, runner, args.stop_grace, args.permission_grace)
+    try:
+        if args.poll:
+            watcher.run_polling(args.interval)
+        else:
+            try:
+                watcher.run_inotify(args.interval)
+            except OSError as e:
+                log(f"inotify unavailable ({e}), falling back to polling")
+                watcher.run_polling(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()